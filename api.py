@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+from datetime import date, datetime
+
+from flask import Response, abort, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#----------------------------------------------------------------------------#
+# JSON API helpers.
+#----------------------------------------------------------------------------#
+
+# Listing payloads are columnar -- {"fields": [...], "data": [[...], ...]} --
+# so query rows are encoded as they come back, without a dict per row, and
+# the field names are sent once per page instead of once per row.
+
+MIN_COMPRESS_BYTES = 512
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default,
+                            option=orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def requested_fields(available):
+    # ?fields=id,name -> the requested subset, in the order asked for
+    fields = request.args.get('fields')
+    if not fields:
+        return list(available)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        abort(400, 'unknown fields: %s' % ', '.join(unknown))
+    return fields
+
+
+def requested_ids(limit):
+    # {"ids": [1, 2, ...]} in the JSON body
+    payload = request.get_json(silent=True)
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not all(type(id) is int for id in ids):
+        abort(400, 'expected a JSON body {"ids": [...]} of integer ids')
+    if len(ids) > limit:
+        abort(400, 'at most %d ids at once' % limit)
+    return ids
+
+
+def columns(rows, available, fields):
+    positions = [available.index(field) for field in fields]
+    if positions == list(range(len(available))):
+        return [tuple(row) for row in rows]
+    return [tuple(row[i] for i in positions) for row in rows]
+
+
+def listing(rows, available, page=None):
+    fields = requested_fields(available)
+    payload = {'fields': fields, 'data': columns(rows, available, fields)}
+    if page is not None:
+        payload['limit'] = page.limit
+        payload['next'] = page.next_cursor
+        payload['prev'] = page.prev_cursor
+    return payload
+
+
+def query_fields(query):
+    return [column['name'] for column in query.column_descriptions]
+
+
+def detail(data):
+    fields = requested_fields(list(data))
+    return json_response(dict((field, data[field]) for field in fields))
+
+
+def json_response(payload, status=200):
+    body = encode_json(payload)
+    etag = hashlib.sha1(body).hexdigest()
+    # weak: the same entity is served under different content codings
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    response = Response(body, status=status, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    if len(body) >= MIN_COMPRESS_BYTES:
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            response.set_data(brotli.compress(body, quality=5))
+            response.content_encoding = 'br'
+        elif accepted['gzip']:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.content_encoding = 'gzip'
+    return response
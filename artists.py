@@ -0,0 +1,252 @@
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
+
+import api
+from dates import label_datetimes
+from exporter import export_response
+from extensions import cache, db, replicas, writes
+from forms import ArtistForm
+from models import Artist, artist_calendar_query, artist_detail_query, artist_listing_query, artist_search, \
+    invalidate_artist_pages, live, show_venue_ids, soft_delete, split_shows
+from pagination import listing_page
+from schedule import calendar_json, render_calendar
+from writes import flash_result
+
+bp = Blueprint('artists', __name__)
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists')
+@cache.cached('artists')
+@replicas.reads
+def artists():
+    page = listing_page(artist_listing_query(request.args.get('genre')), [Artist.id])
+    return render_template('pages/artists.html', artists=page.items, page=page)
+
+
+@bp.route('/artists/export')
+@replicas.reads
+def export_artists():
+    columns = ['id', 'name', 'city', 'state', 'phone', 'genres', 'website',
+               'facebook_link', 'image_link', 'seeking_venue', 'seeking_description']
+    query = db.session.query(*[getattr(Artist, column) for column in columns])\
+        .filter(live(Artist)).order_by(Artist.id)
+    return export_response('artists', columns, query)
+
+
+@bp.route('/artists/search', methods=['POST'])
+@replicas.reads
+def search_artists():
+    search = request.form.get('search_term', '')
+    search_result = artist_search.search(search, current_app.config['SEARCH_RESULT_LIMIT'])
+    response = {'count': len(search_result), 'data': search_result}
+    return render_template('pages/search_artists.html', results=response, search_term=search)
+
+
+@bp.route('/artists/<int:artist_id>')
+@cache.cached('artist', 'artist_id')
+@replicas.reads
+def show_artist(artist_id):
+    data = artist_detail(artist_id)
+    label_datetimes(data['past_shows'] + data['upcoming_shows'])
+    return render_template('pages/show_artist.html', artist=data)
+
+
+@bp.route('/artists/<int:artist_id>/calendar')
+@cache.cached('artist', 'artist_id')
+@replicas.reads
+def artist_calendar(artist_id):
+    artist = db.session.query(Artist.name).filter(Artist.id == artist_id, live(Artist)).first() or abort(404)
+    return render_calendar(artist.name, url_for('.show_artist', artist_id=artist_id), 'venue',
+                           lambda start, end: artist_calendar_query(artist_id, start, end))
+
+
+def artist_detail(artist_id):
+    now = datetime.utcnow()
+    rows = artist_detail_query(artist_id).all()
+    if not rows:
+        abort(404)
+    artist = rows[0].Artist
+
+    past_shows, upcoming_shows = split_shows([{
+        'id': row.show_id,
+        'venue_id': row.venue_id,
+        'venue_name': row.venue_name,
+        'venue_image_link': row.venue_image_link,
+        'start_time': row.start_time
+    } for row in rows if row.venue_id is not None], now)
+
+    return {
+        'id': artist_id,
+        'name': artist.name,
+        'genres': artist.genres or [],
+        'city': artist.city,
+        'state': artist.state,
+        'phone': artist.phone,
+        'website': artist.website,
+        'facebook_link': artist.facebook_link,
+        'seeking_venue': artist.seeking_venue,
+        'seeking_description': artist.seeking_description,
+        'image_link': artist.image_link,
+        'past_shows': past_shows,
+        'upcoming_shows': upcoming_shows,
+        'past_shows_count': len(past_shows),
+        'upcoming_shows_count': len(upcoming_shows)
+    }
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    # DONE 
+    form = ArtistForm()
+    artist = Artist.query.filter(Artist.id == artist_id, live(Artist)).first_or_404()
+    form.name.data = artist.name
+    form.city.data = artist.city
+    form.state.data = artist.state
+    form.phone.data = artist.phone
+    form.image_link.data = artist.image_link
+    form.facebook_link.data = artist.facebook_link
+    form.website.data = artist.website
+    form.genres.data = artist.genres
+    form.seeking_venue.data = artist.seeking_venue,
+    form.seeking_description.data = artist.seeking_description
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # DONE: take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+    name = request.form['name']
+    seeking_venue = True if request.form.get('seeking_venue') == 'y' else False
+    values = dict(
+        id=artist_id,
+        name=name,
+        city=request.form['city'],
+        state=request.form['state'],
+        phone=request.form['phone'],
+        genres=request.form.getlist('genres'),
+        website=request.form['website'],
+        facebook_link=request.form['facebook_link'],
+        image_link=request.form['image_link'],
+        seeking_venue=seeking_venue,
+        seeking_description=request.form['seeking_description'] if seeking_venue == True else None)
+    flash_result(writes.submit('edit_artist', values),
+                 done='Artist ' + name + ' successfully updated 🚀 ',
+                 failed='Artist ' + name + ' cannot be updated! 😞',
+                 queued='Artist ' + name + ' will be updated in a moment 🚀 ')
+    return redirect(url_for('.show_artist', artist_id=artist_id))
+
+
+@writes.operation('edit_artist')
+def apply_edit_artist(values):
+    values = dict(values)
+    artist_id = values.pop('id')
+    artist = db.session.query(Artist).filter(Artist.id == artist_id, live(Artist)).first()
+    if artist is None:
+        # deleted, or never there, since the form was rendered
+        raise ValueError('there is no artist %d' % artist_id)
+    for name, value in values.items():
+        setattr(artist, name, value)
+    return artist, lambda: invalidate_artist_pages(artist_id, venue_ids=show_venue_ids(artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    # called upon submitting the new artist listing form
+    # DONE: insert form data as a new Venue record in the db, instead
+    # DONE: modify data to be the data object returned from db insertion
+    # DONE: on unsuccessful db insert, flash an error instead.
+    # e.g., flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+    name = request.form['name']
+    values = dict(
+        name=name,
+        city=request.form['city'],
+        state=request.form['state'],
+        phone=request.form['phone'],
+        genres=request.form.getlist('genres'),
+        facebook_link=request.form['facebook_link'])
+    flash_result(writes.submit('create_artist', values),
+                 done='Artist ' + name + ' was successfully created! 🚀 ',
+                 failed='Artist ' + name + ' could not be created at this time. Please try again later 😞',
+                 queued='Artist ' + name + ' will be listed in a moment 🚀 ')
+    return redirect(url_for('index'))
+
+
+@writes.operation('create_artist')
+def apply_create_artist(values):
+    artist = Artist(**values)
+    db.session.add(artist)
+    return artist, lambda: cache.invalidate('artists')
+
+
+@bp.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    name = db.session.query(Artist.name).filter(Artist.id == artist_id, live(Artist)).scalar() or abort(404)
+    try:
+        delete_artists([artist_id])
+        flash('Artist ' + name + ' successfully deleted!')
+    except:
+        db.session.rollback()
+        flash('Artist ' + name + ' could not be deleted at this time. Please try again later')
+    finally:
+        db.session.close()
+        return redirect(url_for('index'))
+
+
+def delete_artists(artist_ids):
+    # -> the ids of the artists deleted; see Deletes in models.py
+    artist_ids, venue_ids = soft_delete(Artist, artist_ids)
+    db.session.commit()
+    if artist_ids:
+        artist_search.invalidate()
+        invalidate_artist_pages(*artist_ids, venue_ids=venue_ids)
+    return artist_ids
+
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/artists')
+@replicas.reads
+def api_artists():
+    query = artist_listing_query(request.args.get('genre'))
+    page = listing_page(query, [Artist.id])
+    return api.json_response(api.listing(page.items, api.query_fields(query), page))
+
+
+@bp.route('/api/v1/artists/<int:artist_id>')
+@replicas.reads
+def api_artist(artist_id):
+    return api.detail(artist_detail(artist_id))
+
+
+@bp.route('/api/v1/artists/<int:artist_id>/calendar')
+@replicas.reads
+def api_artist_calendar(artist_id):
+    db.session.query(Artist.id).filter(Artist.id == artist_id, live(Artist)).first() or abort(404)
+    return calendar_json(lambda start, end: artist_calendar_query(artist_id, start, end))
+
+
+@bp.route('/api/v1/artists/delete', methods=['POST'])
+def api_delete_artists():
+    # {"ids": [...]}: one UPDATE for all of them
+    ids = api.requested_ids(current_app.config['MAX_BULK_DELETE'])
+    return api.json_response({'deleted': delete_artists(ids)})
@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+#----------------------------------------------------------------------------#
+# Static assets.
+#----------------------------------------------------------------------------#
+
+# `flask build-assets` copies every file under static/ to static/dist/ with a
+# hash of its content in the name (css/main.css -> dist/css/main.1a2b3c4d5e6f.css),
+# concatenates and minifies the BUNDLES, and writes .gz (and, when brotli is
+# installed, .br) variants of the text files next to them. assets.json maps
+# each source path and bundle name to its fingerprinted file.
+#
+# A fingerprinted name never changes content, so /static/dist/ is served
+# with a year's max-age and `immutable`, picking the pre-compressed variant
+# the browser accepts. Without a build, or with ASSETS_MANIFEST off (the
+# default in debug), templates get the plain source files, so editing a
+# stylesheet needs no rebuild.
+
+DIST = 'dist'
+MANIFEST = 'assets.json'
+ONE_YEAR = 365 * 24 * 3600
+
+# in the order the browser ran them as separate files
+BUNDLES = {
+    'css/app.css': ['css/bootstrap.min.css', 'css/layout.main.css', 'css/main.css',
+                    'css/main.responsive.css', 'css/main.quickfix.css'],
+    'js/head.js': ['js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'],
+    'js/app.js': ['js/script.js', 'js/deleteBtn.js', 'js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js'],
+}
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.eot', '.ttf', '.json', '.txt')
+# preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*(?!!).*?\*/)|\s*([{};,>])\s*|(:)\s+|(\s+)''', re.S)
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$', re.M)
+
+
+class Assets(object):
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        manifest = None
+        path = os.path.join(app.root_path, MANIFEST)
+        if app.config.get('ASSETS_MANIFEST', True) and os.path.isfile(path):
+            with open(path) as f:
+                manifest = json.load(f)
+        app.extensions['assets'] = manifest
+        app.jinja_env.globals['asset_url'] = asset_url
+        app.jinja_env.globals['bundle_urls'] = bundle_urls
+        app.add_url_rule('%s/%s/<path:filename>' % (app.static_url_path, DIST), 'assets', send_asset)
+
+
+def asset_url(filename):
+    # url_for('static', filename=...) of the fingerprinted copy, once built
+    manifest = current_app.extensions['assets']
+    if manifest and filename in manifest:
+        filename = manifest[filename]
+    return url_for('static', filename=filename)
+
+
+def bundle_urls(name):
+    # the built bundle, or its source files one by one
+    manifest = current_app.extensions['assets']
+    if manifest and name in manifest:
+        return [url_for('static', filename=manifest[name])]
+    return [url_for('static', filename=filename) for filename in BUNDLES[name]]
+
+
+def send_asset(filename):
+    directory = os.path.join(current_app.static_folder, DIST)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        path = safe_join(directory, filename + suffix)
+        if request.accept_encodings[encoding] and path and os.path.isfile(path):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'public, max-age=%d, immutable' % ONE_YEAR
+    return response
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+
+def minify_css(css):
+    def token(match):
+        string, comment, punctuation, colon, space = match.groups()
+        if string:
+            return string
+        if comment:
+            return ''
+        return punctuation or colon or ' '
+    return CSS_TOKENS.sub(token, css).strip()
+
+
+def minify_js(js, filename):
+    # already minified files as they are; others only if rjsmin is there,
+    # a regex is not a safe JavaScript minifier
+    js = SOURCE_MAP.sub('', js)
+    if filename.endswith('.min.js'):
+        return js
+    try:
+        import rjsmin
+    except ImportError:
+        return js
+    return rjsmin.jsmin(js)
+
+
+def rewrite_css_urls(css, source, target, manifest):
+    # url(../fonts/x.woff) in `source` -> the fingerprinted font, relative to `target`
+    def rewrite(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        path, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+        if path not in manifest:
+            return match.group(0)
+        url = posixpath.relpath(manifest[path], posixpath.dirname(target)) + suffix
+        return 'url(%s%s%s)' % (quote, url, quote)
+    return CSS_URL.sub(rewrite, css)
+
+
+def fingerprinted(filename, content):
+    root, ext = posixpath.splitext(filename)
+    return '%s/%s.%s%s' % (DIST, root, hashlib.sha256(content).hexdigest()[:12], ext)
+
+
+def write(static_folder, filename, content):
+    path = os.path.join(static_folder, *filename.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if not filename.endswith(COMPRESSIBLE):
+        return
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+def source_files(static_folder):
+    for directory, dirnames, filenames in os.walk(static_folder):
+        relative = os.path.relpath(directory, static_folder).replace(os.sep, '/')
+        if relative == DIST:
+            dirnames[:] = []
+            continue
+        for filename in sorted(filenames):
+            if not filename.startswith('.'):
+                yield filename if relative == '.' else '%s/%s' % (relative, filename)
+
+
+def build(static_folder, manifest_path):
+    # -> the manifest; static/dist/ is rebuilt from scratch
+    shutil.rmtree(os.path.join(static_folder, DIST), ignore_errors=True)
+    manifest = {}
+
+    def read(filename):
+        with open(os.path.join(static_folder, *filename.split('/')), 'rb') as f:
+            return f.read()
+
+    def add(filename, content):
+        manifest[filename] = fingerprinted(filename, content)
+        write(static_folder, manifest[filename], content)
+
+    sources = list(source_files(static_folder))
+    # stylesheets last: they refer to the fonts and images by fingerprint
+    for filename in [name for name in sources if not name.endswith('.css')]:
+        add(filename, read(filename))
+    for filename in [name for name in sources if name.endswith('.css')]:
+        css = read(filename).decode('utf-8')
+        # the same directory depth under dist/, so the relative urls hold
+        add(filename, rewrite_css_urls(css, filename, DIST + '/' + filename, manifest).encode('utf-8'))
+
+    for name, filenames in sorted(BUNDLES.items()):
+        parts = []
+        for filename in filenames:
+            text = read(filename).decode('utf-8')
+            if name.endswith('.css'):
+                parts.append(minify_css(rewrite_css_urls(text, filename, DIST + '/' + name, manifest)))
+            else:
+                parts.append(minify_js(text, filename))
+        # a file without a trailing semicolon must not run into the next
+        add(name, ('\n' if name.endswith('.css') else '\n;\n').join(parts).encode('utf-8'))
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
@@ -0,0 +1,110 @@
+"""Query plans of the hot show/venue queries with and without their indexes.
+
+Drops the indexes added in migrations 704e5881a8dd and 8c2f4e61d9b7,
+prints the plan and the median run time of the venue page, artist page,
+venue calendar, venues listing and date-range show listing queries,
+recreates the indexes and prints the same again:
+
+    python -m benchmarks.explain_indexes --seed 2000
+
+--seed adds that many synthetic venues (and 5x as many artists, 50x as many
+shows) first, so the planner has enough rows to prefer the indexes.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from extensions import db
+from models import Venue, Show, venue_listing_query, venue_detail_query, artist_detail_query, \
+    show_listing_query, venue_calendar_query
+from benchmarks.seed import seed
+
+HOT_INDEXES = ['ix_show_venue_id_start_time', 'ix_show_artist_id_start_time', 'ix_venue_city_state_id',
+               'ix_show_start_time_id']
+
+
+def analyze():
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE venue; ANALYZE artist; ANALYZE show'))
+    else:
+        db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def explain(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    prefix = 'EXPLAIN ' if db.engine.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN '
+    connection = db.session.connection()
+    plan = connection.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        connection.exec_driver_sql(str(compiled), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return [' | '.join(str(col) for col in row) for row in plan], statistics.median(timings)
+
+
+def hot_queries():
+    venue_id = db.session.query(Show.venue_id).limit(1).scalar()
+    artist_id = db.session.query(Show.artist_id).limit(1).scalar()
+    now = datetime.utcnow()
+    return [
+        ('venue page', venue_detail_query(venue_id)),
+        ('artist page', artist_detail_query(artist_id)),
+        ('venue calendar, one month', venue_calendar_query(venue_id, now, now + timedelta(days=31))
+            .order_by(Show.start_time, Show.id).limit(50)),
+        ('venues listing', venue_listing_query()
+            .order_by(Venue.city, Venue.state, Venue.id).limit(50)),
+        ('shows listing, one weekend', show_listing_query(now, now + timedelta(days=2))
+            .order_by(Show.start_time, Show.id).limit(50)),
+    ]
+
+
+def report(title):
+    print('=' * 72)
+    print(title)
+    for name, query in hot_queries():
+        plan, ms = explain(query)
+        print('-- %s (median %.2f ms)' % (name, ms))
+        for line in plan:
+            print('   ' + line)
+
+
+def set_indexes(create):
+    indexes = [index for table in db.metadata.tables.values()
+               for index in table.indexes if index.name in HOT_INDEXES]
+    with db.engine.begin() as connection:
+        for index in indexes:
+            if create:
+                index.create(connection, checkfirst=True)
+            else:
+                index.drop(connection, checkfirst=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0, metavar='VENUES',
+                        help='add this many synthetic venues before explaining')
+    args = parser.parse_args(argv)
+
+    with create_app(migrations=False).app_context():
+        if args.seed:
+            seed(args.seed, args.seed * 5, args.seed * 50)
+        db.session.close()
+        set_indexes(create=False)
+        analyze()
+        report('without indexes')
+        db.session.close()
+        set_indexes(create=True)
+        analyze()
+        report('with indexes')
+        db.session.close()
+
+
+if __name__ == '__main__':
+    main()
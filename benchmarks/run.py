@@ -0,0 +1,200 @@
+"""Latency and queries-per-request for every route, with regression checks.
+
+    python -m benchmarks.seed --venues 10000 --artists 50000 --shows 1000000
+    python -m benchmarks.run --output benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+Each GET route in the app (and the two search POSTs) is requested through
+the Flask test client against the configured database, with the response
+cache off unless --with-cache is given. Ids in the URL are sampled from the
+catalog. For every route the p50/p99/mean latency, the number of SQL
+statements and the status code are written as JSON.
+
+--compare exits non-zero when a route issues more statements than in the
+baseline -- the guard against N+1 queries creeping back -- or when its p99
+is more than --tolerance slower.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from extensions import db, cache
+from models import Venue, Artist, Show
+
+SKIPPED_ENDPOINTS = {'static', 'metrics', 'cache_stats'}
+SEARCH_TERMS = ['blue', 'city', 'jazz', 'CA', 'velvet echo']
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+
+def sample_ids():
+    # entities that actually have shows, so detail pages do real work
+    venue_id = db.session.query(Show.venue_id).order_by(Show.venue_id).limit(1).scalar() \
+        or db.session.query(db.func.min(Venue.id)).scalar()
+    artist_id = db.session.query(Show.artist_id).order_by(Show.artist_id).limit(1).scalar() \
+        or db.session.query(db.func.min(Artist.id)).scalar()
+    located = db.session.query(Venue.latitude, Venue.longitude)\
+        .filter(Venue.latitude.isnot(None)).order_by(Venue.id).first()
+    return {'venue_id': venue_id, 'artist_id': artist_id, 'located': located}
+
+
+def query_string(view, ids):
+    # the views that need arguments to do real work
+    if view in ('nearby_venues', 'api_nearby_venues') and ids['located']:
+        return '?lat=%s&lon=%s&radius=50' % tuple(ids['located'])
+    return ''
+
+
+def routes(app, include_exports):
+    ids = sample_ids()
+    found = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        # blueprint views are 'venues.export_venues' etc.
+        view = rule.endpoint.rpartition('.')[2]
+        if view in SKIPPED_ENDPOINTS:
+            continue
+        if view.startswith('export_') and not include_exports:
+            continue
+        if 'GET' in rule.methods:
+            if any(argument not in ids for argument in rule.arguments):
+                continue
+            path = rule.rule
+            for argument in rule.arguments:
+                path = path.replace('<int:%s>' % argument, str(ids[argument]))
+                path = path.replace('<%s>' % argument, str(ids[argument]))
+            found.append(('GET', path + query_string(view, ids), None))
+        elif view.startswith('search_'):
+            found.append(('POST', rule.rule, 'search_term'))
+    return found
+
+
+def measure(client, method, path, form_field, iterations):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    # the Engine class: read replicas have engines of their own
+    event.listen(Engine, 'before_cursor_execute', listener)
+    try:
+        timings = []
+        queries = []
+        status = None
+        for i in range(iterations):
+            del statements[:]
+            started = time.perf_counter()
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                term = SEARCH_TERMS[i % len(SEARCH_TERMS)]
+                response = client.post(path, data={form_field: term})
+            response.get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(statements))
+            status = response.status_code
+    finally:
+        event.remove(Engine, 'before_cursor_execute', listener)
+    return {
+        'status': status,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries': max(queries),
+    }
+
+
+def catalog():
+    return {
+        'venues': db.session.query(db.func.count(Venue.id)).scalar(),
+        'artists': db.session.query(db.func.count(Artist.id)).scalar(),
+        'shows': db.session.query(db.func.count(Show.id)).scalar(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for route, current in sorted(results['routes'].items()):
+        previous = baseline['routes'].get(route)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            failures.append('%s: %d queries per request, baseline %d'
+                            % (route, current['queries'], previous['queries']))
+        if current['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+            failures.append('%s: p99 %.2f ms, baseline %.2f ms (+%d%% allowed)'
+                            % (route, current['p99_ms'], previous['p99_ms'], tolerance * 100))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='fail on regressions against this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed p99 slowdown against the baseline (default 0.25 = 25%%)')
+    parser.add_argument('--with-cache', action='store_true', help='keep the response cache on')
+    parser.add_argument('--include-exports', action='store_true', help='also time the full exports')
+    args = parser.parse_args(argv)
+
+    app = create_app(migrations=False)
+    app.config['WTF_CSRF_ENABLED'] = False
+    if not args.with_cache:
+        cache.backend = None
+    client = app.test_client()
+
+    with app.app_context():
+        results = {
+            'created': datetime.utcnow().isoformat() + 'Z',
+            'revision': git_revision(),
+            'database': db.engine.dialect.name,
+            'catalog': catalog(),
+            'iterations': args.iterations,
+            'cache': args.with_cache,
+            'routes': {},
+        }
+        for method, path, form_field in routes(app, args.include_exports):
+            measure(client, method, path, form_field, args.warmup)
+            result = measure(client, method, path, form_field, args.iterations)
+            route = '%s %s' % (method, path)
+            results['routes'][route] = result
+            print('%-44s %3s  p50 %8.2f ms  p99 %8.2f ms  %3d queries'
+                  % (route, result['status'], result['p50_ms'], result['p99_ms'], result['queries']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('catalog') != results['catalog']:
+            print('WARNING the baseline was measured on another catalog: %s'
+                  % json.dumps(baseline.get('catalog'), sort_keys=True))
+        failures = compare(results, baseline, args.tolerance)
+        for failure in failures:
+            print('REGRESSION ' + failure)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
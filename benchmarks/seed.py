@@ -0,0 +1,127 @@
+"""Seed the configured database with a synthetic catalog.
+
+    python -m benchmarks.seed --venues 10000 --artists 50000 --shows 1000000
+
+Rows are generated from a fixed random seed, so two runs with the same
+arguments produce the same catalog, and inserted in batches with one
+executemany each. Shows are spread a year either side of now, so about
+half of them are upcoming, and last one to four hours. A show that would
+double-book its venue or artist is moved to another random hour (and
+dropped after a few tries), so the catalog passes the overlap constraints.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from bookings import BookingIndex
+from extensions import db
+from models import Venue, Artist, Show, refresh_show_counters
+
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk',
+          'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop',
+          'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul', 'Other']
+STATES = ['CA', 'NY', 'TX', 'FL', 'IL', 'WA', 'MA', 'GA', 'CO', 'OR', 'TN', 'LA']
+WORDS = ['Blue', 'Red', 'Velvet', 'Electric', 'Silver', 'Hollow', 'Golden', 'Midnight',
+         'Echo', 'Harbor', 'Lantern', 'Union', 'Park', 'Royal', 'Wild', 'Static']
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert(model, rows, batch_size):
+    count = 0
+    for batch in batches(rows, batch_size):
+        db.session.execute(model.__table__.insert(), batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+
+def seed(venues, artists, shows, batch_size=10000, random_seed=1):
+    rng = random.Random(random_seed)
+    cities = [('%s %s' % (rng.choice(WORDS), rng.choice(['City', 'Falls', 'Springs', 'Heights'])),
+               rng.choice(STATES)) for _ in range(max(1, venues // 25))]
+    name = lambda: ' '.join(rng.sample(WORDS, 2))
+    # venues lie within ~20km of their city's centre, somewhere in the
+    # contiguous US; drawn apart so the rest of the catalog stays the same
+    places = random.Random(random_seed + 1)
+    centres = dict((city, (places.uniform(26, 48), places.uniform(-123, -71))) for city in cities)
+    started = time.perf_counter()
+
+    def venue_rows():
+        for i in range(venues):
+            city, state = rng.choice(cities)
+            latitude, longitude = centres[(city, state)]
+            yield {'name': '%s %d' % (name(), i), 'city': city, 'state': state,
+                   'latitude': latitude + places.uniform(-0.2, 0.2),
+                   'longitude': longitude + places.uniform(-0.2, 0.2),
+                   'address': '%d %s St' % (rng.randint(1, 9999), rng.choice(WORDS)),
+                   'phone': '555-%04d' % rng.randint(0, 9999),
+                   'genres': rng.sample(GENRES, rng.randint(1, 3)),
+                   'facebook_link': 'https://www.facebook.com/venue%d' % i,
+                   'seeking_talent': rng.random() < 0.3}
+
+    def artist_rows():
+        for i in range(artists):
+            city, state = rng.choice(cities)
+            yield {'name': '%s %d' % (name(), i), 'city': city, 'state': state,
+                   'phone': '555-%04d' % rng.randint(0, 9999),
+                   'genres': rng.sample(GENRES, rng.randint(1, 2)),
+                   'facebook_link': 'https://www.facebook.com/artist%d' % i,
+                   'seeking_venue': rng.random() < 0.5}
+
+    insert(Venue, venue_rows(), batch_size)
+    insert(Artist, artist_rows(), batch_size)
+    venue_ids = [row.id for row in db.session.query(Venue.id)]
+    artist_ids = [row.id for row in db.session.query(Artist.id)]
+
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+    # seeding starts from an empty show table: nothing to load
+    bookings = BookingIndex(lambda field, id: ())
+
+    def show_rows():
+        for _ in range(shows):
+            venue_id, artist_id = rng.choice(venue_ids), rng.choice(artist_ids)
+            for attempt in range(5):
+                start = now + timedelta(hours=rng.randint(-24 * 365, 24 * 365))
+                end = start + timedelta(hours=rng.randint(1, 4))
+                if bookings.conflict(venue_id, artist_id, start, end)[0] is None:
+                    break
+            else:
+                continue
+            bookings.add(venue_id, artist_id, start, end)
+            yield {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': start, 'end_time': end}
+
+    shows = insert(Show, show_rows(), batch_size)
+    refresh_show_counters(full=True)
+    return shows, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--artists', type=int, default=50000)
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--random-seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with create_app(migrations=False).app_context():
+        shows, seconds = seed(args.venues, args.artists, args.shows, args.batch_size, args.random_seed)
+    print('seeded %d venues, %d artists, %d shows in %.1fs'
+          % (args.venues, args.artists, shows, seconds))
+
+
+if __name__ == '__main__':
+    main()
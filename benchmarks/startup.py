@@ -0,0 +1,105 @@
+"""Cold-start time of a worker: importing wsgi.py in a fresh interpreter.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --output benchmarks/startup.json
+    python -m benchmarks.startup --compare benchmarks/startup.json
+
+Each run starts `python -X importtime -c "import wsgi"`, which is what a
+gunicorn worker executes before it can serve, and records the wall time of
+the import and the self time of every module, summed per top-level package
+(flask, sqlalchemy, wtforms, ...). The median of --runs runs is reported.
+
+--compare exits non-zero when the median import is more than --tolerance
+slower than the baseline; packages that were not imported at all
+in the baseline (an eager import creeping back in) are listed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATEMENT = ('import time; started = time.perf_counter(); import wsgi; '
+             'print(time.perf_counter() - started)')
+
+
+def run_once():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STATEMENT],
+                            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    if result.returncode:
+        sys.exit(result.stderr)
+    packages = defaultdict(int)
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us)
+    return float(result.stdout.strip().splitlines()[-1]) * 1000, packages
+
+
+def measure(runs):
+    totals = []
+    packages = defaultdict(list)
+    for _ in range(runs):
+        total, run_packages = run_once()
+        totals.append(total)
+        for name, self_us in run_packages.items():
+            packages[name].append(self_us / 1000.0)
+    return {
+        'python': sys.version.split()[0],
+        'runs': runs,
+        'import_ms': round(statistics.median(totals), 1),
+        'packages_ms': dict((name, round(statistics.median(values), 1))
+                            for name, values in packages.items()),
+    }
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    if results['import_ms'] > baseline['import_ms'] * (1 + tolerance):
+        failures.append('import wsgi: %.1f ms, baseline %.1f ms (+%d%% allowed)'
+                        % (results['import_ms'], baseline['import_ms'], tolerance * 100))
+    added = sorted(set(results['packages_ms']) - set(baseline['packages_ms']),
+                   key=lambda name: -results['packages_ms'][name])
+    for name in added:
+        print('NEW IMPORT %-28s %8.1f ms' % (name, results['packages_ms'][name]))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--top', type=int, default=15, help='packages to print')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='fail on regressions against this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline (default 0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    print('import wsgi %8.1f ms (median of %d)' % (results['import_ms'], args.runs))
+    heaviest = sorted(results['packages_ms'].items(), key=lambda item: -item[1])
+    for name, ms in heaviest[:args.top]:
+        print('  %-28s %8.1f ms' % (name, ms))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print('REGRESSION ' + failure)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
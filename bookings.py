@@ -0,0 +1,78 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+#----------------------------------------------------------------------------#
+# Bookings.
+#----------------------------------------------------------------------------#
+
+# A show books its venue and its artist for [start_time, end_time). Two
+# bookings of the same venue or the same artist may not overlap: PostgreSQL
+# enforces it with exclusion constraints (see the show end time migration),
+# and the create form checks first with a bounded index range (see
+# models.conflicting_show_query) so it can say which booking is in the way.
+#
+# Imports check thousands of new shows against each other and against the
+# catalog, so they keep the booked intervals in memory instead. Bookings of
+# one venue (or artist) never overlap, which makes a list sorted by start
+# time an interval index: only the last booking starting before the new
+# show ends can overlap it, and bisect finds that one in O(log n).
+
+DEFAULT_DURATION = timedelta(hours=2)
+MAX_DURATION = timedelta(hours=24)
+
+
+def booking_error(start, end):
+    if end <= start:
+        return 'must be after the start time'
+    if end - start > MAX_DURATION:
+        return 'a show can last at most %d hours' % (MAX_DURATION.total_seconds() // 3600)
+    return None
+
+
+class Booked(object):
+
+    def __init__(self, intervals=()):
+        # (start, end) pairs ordered by start
+        self.starts = []
+        self.ends = []
+        for start, end in intervals:
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def overlapping(self, start, end):
+        i = bisect_left(self.starts, end) - 1
+        if i >= 0 and self.ends[i] > start:
+            return self.starts[i], self.ends[i]
+        return None
+
+    def add(self, start, end):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+
+class BookingIndex(object):
+
+    def __init__(self, load):
+        # load(field, id) -> the (start, end) bookings of that venue or
+        # artist in start order; called once per venue and artist
+        self._load = load
+        self._booked = {}
+
+    def booked(self, field, id):
+        key = (field, id)
+        if key not in self._booked:
+            self._booked[key] = Booked(self._load(field, id))
+        return self._booked[key]
+
+    def conflict(self, venue_id, artist_id, start, end):
+        # the first of 'venue_id', 'artist_id' that is already booked, with the booking
+        for field, id in (('venue_id', venue_id), ('artist_id', artist_id)):
+            overlapping = self.booked(field, id).overlapping(start, end)
+            if overlapping:
+                return field, overlapping
+        return None, None
+
+    def add(self, venue_id, artist_id, start, end):
+        self.booked('venue_id', venue_id).add(start, end)
+        self.booked('artist_id', artist_id).add(start, end)
@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, g, request, session
+
+from replicas import sticky
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+# Rendered GET pages are cached per route namespace ('venues', 'venue', ...)
+# and, for detail pages, per id. Every key embeds a generation counter for
+# its namespace/id; a write bumps the counter, so stale pages are never
+# served again and simply age out of the backend. The counters themselves
+# are never evicted: losing one would restart it at 0 and bring back the
+# pages cached under the old numbers.
+#
+# Replicas lag behind the primary. A browser that has just written reads
+# from the primary (see replicas.py) and skips the cache, which may hold
+# the page as it was before its write; and a page read from a replica within
+# REPLICA_STICKY_SECONDS of an invalidation of its namespace/id is served
+# but not stored, as it may predate the write.
+#
+# The memory backend is per process. With more than one worker, or to let
+# the flask commands' invalidations reach the workers, use redis.
+
+
+class MemoryCache(object):
+    # in-process LRU with a per-entry expiry; the generation counters sit
+    # beside it, a few per venue or artist
+
+    shared = False
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._changed = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters[key] = self._counters.get(key, 0) + 1
+            self._changed[key] = time.time()
+            return value
+
+    def changed_at(self, key):
+        # the time of the last incr of `key`, 0 if none
+        with self._lock:
+            return self._changed.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self._changed.clear()
+
+    def info(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        size = sum(len(value[0]) for value, _ in entries)
+        return {'entries': len(entries), 'bytes': size}
+
+
+class RedisCache(object):
+    # any client with redis-py's get/set/incr/flushdb works here; pages
+    # expire, counters are set without one
+
+    def __init__(self, client, ttl=300, prefix='fyyur:', shared=True):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.shared = shared
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        mimetype, _, body = value.partition(b'\n')
+        return body, mimetype.decode('ascii')
+
+    def set(self, key, value, ttl=None):
+        body, mimetype = value
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, mimetype.encode('ascii') + b'\n' + body,
+                        ex=ttl or None)
+
+    def counter(self, key):
+        value = self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        value = self.client.incr(self.prefix + key)
+        self.client.set(self.prefix + 'at:' + key, repr(time.time()).encode('ascii'))
+        return value
+
+    def changed_at(self, key):
+        value = self.client.get(self.prefix + 'at:' + key)
+        return float(value) if value is not None else 0
+
+    def clear(self):
+        self.client.flushdb()
+
+    def info(self):
+        return {}
+
+
+class LocalRedis(object):
+    # stand-in for a redis client in development and tests
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            value, expires = self._values.get(name, (None, None))
+            if expires is not None and expires < time.time():
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._values[name] = (value, time.time() + ex if ex else None)
+        return True
+
+    def incr(self, name):
+        with self._lock:
+            value, expires = self._values.get(name, (b'0', None))
+            value = str(int(value) + 1).encode('ascii')
+            self._values[name] = (value, expires)
+            return int(value)
+
+    def flushdb(self):
+        with self._lock:
+            self._values.clear()
+        return True
+
+
+class ResponseCache(object):
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'memory')
+        ttl = app.config.get('CACHE_TTL', 300)
+        if kind == 'memory':
+            self.backend = MemoryCache(app.config.get('CACHE_MAX_ENTRIES', 1024), ttl)
+        elif kind == 'redis':
+            url = app.config.get('CACHE_REDIS_URL', 'local://')
+            if url == 'local://':
+                self.backend = RedisCache(LocalRedis(), ttl, shared=False)
+            else:
+                import redis
+                self.backend = RedisCache(redis.Redis.from_url(url), ttl)
+        else:
+            self.backend = None
+        app.extensions['response_cache'] = self
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def shared(self):
+        # whether every worker, and the flask commands, see one cache
+        return self.backend is not None and self.backend.shared
+
+    def generation(self, namespace, id=None):
+        # the counter invalidate() bumps; always 0 without a backend
+        if self.backend is None:
+            return 0
+        return self._generation(namespace, id)
+
+    def _generation(self, namespace, id=None):
+        return self.backend.counter(self._generation_key(namespace, id))
+
+    def _generation_key(self, namespace, id=None):
+        return 'gen:%s:%s' % (namespace, '' if id is None else id)
+
+    def _key(self, namespace, id):
+        return 'page:%s:%s:%d:%d:%s' % (
+            namespace, '' if id is None else id,
+            self._generation(namespace), self._generation(namespace, id),
+            request.full_path)
+
+    def _maybe_stale(self, namespace, id):
+        # read from a replica within REPLICA_STICKY_SECONDS of an invalidation
+        if g.get('replica') is None:
+            return False
+        since = time.time() - current_app.config.get('REPLICA_STICKY_SECONDS', 0)
+        return max(self.backend.changed_at(self._generation_key(namespace)),
+                   self.backend.changed_at(self._generation_key(namespace, id))) > since
+
+    def cached(self, namespace, id_arg=None):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # a pending flash message belongs to this user only
+                if self.backend is None or request.method != 'GET' or '_flashes' in session or sticky():
+                    return view(*args, **kwargs)
+                id = kwargs.get(id_arg) if id_arg else None
+                key = self._key(namespace, id)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count('hits')
+                    body, mimetype = entry
+                    response = Response(body, mimetype=mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+                self._count('misses')
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response):
+                    response = Response(response)
+                if response.status_code == 200 and not response.is_streamed \
+                        and not self._maybe_stale(namespace, id):
+                    self.backend.set(key, (response.get_data(), response.mimetype))
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, namespace, *ids):
+        # no ids: the namespace as a whole (listing pages and every id)
+        if self.backend is None:
+            return
+        self._count('invalidations')
+        if not ids:
+            self.backend.incr(self._generation_key(namespace))
+        for id in ids:
+            self.backend.incr(self._generation_key(namespace, id))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'shared': self.shared,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / float(lookups), 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
+        if self.backend is not None:
+            stats.update(self.backend.info())
+        return stats
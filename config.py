@@ -1,13 +1,106 @@
 import os
-SECRET_KEY = os.urandom(32)
+# Set SECRET_KEY in production: every gunicorn worker has to sign sessions
+# and CSRF tokens with the same key.
+SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Debug mode, for development only: FLASK_DEBUG=1
+DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
+
+# Link the fingerprinted files of `flask build-assets` (assets.json) when
+# built; off by default in debug, where the source files are edited
+ASSETS_MANIFEST = os.environ.get('ASSETS_MANIFEST', '0' if DEBUG else '1') == '1'
 
 # Connect to the database
+# DATABASE_URL as set by Heroku still uses the postgres:// scheme name,
+# which SQLAlchemy no longer accepts.
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur'
+).replace('postgres://', 'postgresql://', 1)
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool, one per worker process. A worker serves at most
+# GUNICORN_THREADS requests at once, so that is the default pool size; the
+# database sees up to workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    # seconds; below the server's or a proxy's idle connection timeout
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+}
+# SQLite (tests, benchmarks) gets a static or per-thread pool with no size
+if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+    SQLALCHEMY_ENGINE_OPTIONS.update({
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', os.environ.get('GUNICORN_THREADS', 4))),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    })
+
+# Read replicas for the read-only views, comma separated, each with a pool
+# like the primary's. A replica that fails to connect is skipped for
+# REPLICA_RETRY_AFTER seconds and probed again at most every
+# REPLICA_CHECK_INTERVAL; a browser that has written reads from the primary
+# for REPLICA_STICKY_SECONDS, longer than the replicas' usual lag.
+SQLALCHEMY_REPLICA_URIS = [url.strip().replace('postgres://', 'postgresql://', 1)
+                           for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+REPLICA_CHECK_INTERVAL = int(os.environ.get('REPLICA_CHECK_INTERVAL', 10))
+REPLICA_RETRY_AFTER = int(os.environ.get('REPLICA_RETRY_AFTER', 30))
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+# Write-behind: queue the create and edit submissions and commit them in
+# batches from a background thread per worker (see writes.py)
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '0') == '1'
+WRITE_BATCH_SIZE = int(os.environ.get('WRITE_BATCH_SIZE', 100))
+WRITE_FLUSH_INTERVAL = float(os.environ.get('WRITE_FLUSH_INTERVAL', 0.05))
+WRITE_QUEUE_SIZE = int(os.environ.get('WRITE_QUEUE_SIZE', 10000))
+# hours an idempotency key is remembered; `flask purge-write-requests`
+# removes older ones
+WRITE_REQUEST_TTL = int(os.environ.get('WRITE_REQUEST_TTL', 48))
+
+# Deletes: venues and artists are only marked deleted; `flask purge-deleted`
+# removes them (and their shows) off peak
+MAX_BULK_DELETE = 1000
+PURGE_BATCH_SIZE = 1000
+
+# Venues near a point (/venues/nearby)
+NEARBY_RADIUS_KM = 10
+MAX_NEARBY_RADIUS_KM = 200
+NEARBY_LIMIT = 10
+MAX_NEARBY_LIMIT = 50
+# upcoming shows listed per venue
+NEARBY_SHOWS = 3
+
+# Listing pages (keyset pagination)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Venue and artist search (name, city and state)
+SEARCH_RESULT_LIMIT = 20
+
+# Without PostgreSQL, searches and nearest venues use indexes built in each
+# worker (see indexes.py). A write in another process reaches them through
+# the response cache when CACHE_BACKEND is redis, and in at most this many
+# seconds otherwise (0: never).
+IN_PROCESS_INDEX_MAX_AGE = int(os.environ.get('IN_PROCESS_INDEX_MAX_AGE', 60))
+
+# Response cache for the read-only pages: 'memory', 'redis' or 'none'.
+# 'memory' is per process: with more than one worker (WEB_CONCURRENCY) a
+# write, or a flask command, invalidates the pages of one process only, so
+# run those with 'redis'. CACHE_REDIS_URL = 'local://' uses an in-process
+# stand-in for redis.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'local://')
+CACHE_TTL = 300
+CACHE_MAX_ENTRIES = 1024
 
+# Compiled templates, shared by the workers on a host (None: a per-user
+# directory under the system temp dir), and the number of rendered show
+# tiles each worker keeps
+TEMPLATE_BYTECODE_DIR = os.environ.get('TEMPLATE_BYTECODE_DIR')
+FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 10000))
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgres://postgres@localhost:5432/fyyur'
+# Request instrumentation: Server-Timing header, /metrics, slow query log
+SERVER_TIMING = True
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+# a path, or empty for no slow query log
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'slow_query.log')
@@ -0,0 +1,96 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import groupby
+
+#----------------------------------------------------------------------------#
+# Date formatting.
+#----------------------------------------------------------------------------#
+
+# Views hand real datetime objects to the templates. Parsing a babel pattern
+# and resolving a locale is the expensive part of formatting, so both are
+# done once per (format, locale) and reused for every row. dateutil is
+# imported on first use rather than when a worker starts.
+
+FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+    'day': "EEEE MMMM d",
+    'month': "MMMM y",
+    'time': "h:mma",
+}
+
+
+@lru_cache(maxsize=64)
+def formatter(format='medium', locale=None):
+    import babel.dates
+    pattern = babel.dates.parse_pattern(FORMATS.get(format, format))
+    locale = babel.Locale.parse(locale or babel.dates.LC_TIME)
+    return lambda value: pattern.apply(value, locale)
+
+
+def parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    import dateutil.parser
+    return dateutil.parser.parse(value)
+
+
+def parse_range(start=None, end=None):
+    # ?from=&to= -> (start, end), either None when not given; `end` is
+    # exclusive, so a bare date as `to` takes in that whole day
+    if start:
+        start = parse_datetime(start)
+    if end:
+        bare_date = isinstance(end, str) and re.match(r'^\d{4}-\d{2}-\d{2}$', end.strip())
+        end = parse_datetime(end)
+        if bare_date:
+            end += timedelta(days=1)
+    if start and end and end <= start:
+        raise ValueError('the range ends before it starts')
+    return start or None, end or None
+
+
+def month_range(month=None):
+    # '2026-11' -> (datetime(2026, 11, 1), datetime(2026, 12, 1)); the
+    # current month by default. ValueError for '9999-12', which has no end.
+    if month:
+        start = datetime.strptime(month, '%Y-%m')
+    else:
+        start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start, end
+
+
+def format_datetime(value, format='medium', locale=None):
+    return formatter(format, locale)(parse_datetime(value))
+
+
+def format_datetimes(values, format='medium', locale=None):
+    # format a whole column at once; shows often share a start time
+    apply = formatter(format, locale)
+    seen = {}
+    labels = []
+    for value in values:
+        label = seen.get(value)
+        if label is None:
+            label = seen[value] = apply(value)
+        labels.append(label)
+    return labels
+
+
+def label_datetimes(rows, key='start_time', format='full', locale=None):
+    # adds '<key>_label' next to the datetime in each row dict
+    labels = format_datetimes([row[key] for row in rows], format, locale)
+    for row, label in zip(rows, labels):
+        row[key + '_label'] = label
+    return rows
+
+
+def group_by_day(rows, key='start_time', locale=None):
+    # rows in time order -> [{'label': 'Saturday November 7', 'rows': [...]}, ...],
+    # each row labelled with its time of day
+    label_datetimes(rows, key, 'time', locale)
+    label_day = formatter('day', locale)
+    return [{'label': label_day(day_rows[0][key]), 'rows': day_rows}
+            for day_rows in (list(group) for _, group in groupby(rows, key=lambda row: row[key].date()))]
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Response, abort, request, stream_with_context
+
+#----------------------------------------------------------------------------#
+# Bulk export.
+#----------------------------------------------------------------------------#
+
+# Exports are generators over a streamed query: rows are pulled from a
+# server-side cursor and written out in chunks, so memory stays flat no
+# matter how many rows there are. The output can be fed back to
+# `flask import` (lists are ';'-joined in CSV).
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+CHUNK_ROWS = 500
+
+# the format ShowForm's start_time field parses
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _csv_value(value):
+    if isinstance(value, (list, tuple)):
+        return ';'.join(value)
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, [_json_value(value) for value in row]))))
+        if len(lines) == CHUNK_ROWS:
+            lines.append('')
+            yield '\n'.join(lines)
+            lines = []
+    if lines:
+        lines.append('')
+        yield '\n'.join(lines)
+
+
+def export_chunks(format, columns, rows):
+    if format == 'csv':
+        return csv_chunks(columns, rows)
+    return jsonl_chunks(columns, rows)
+
+
+def stream_query(query, batch_size=1000):
+    # yield_per fetches in batches; stream_results asks the driver for a
+    # server-side cursor (psycopg2 named cursor) instead of buffering
+    return query.execution_options(stream_results=True).yield_per(batch_size)
+
+
+def export_response(name, columns, query):
+    format = request.args.get('format', 'csv')
+    if format not in FORMATS:
+        abort(400)
+    chunks = export_chunks(format, columns, stream_query(query))
+    response = Response(stream_with_context(chunks), mimetype=FORMATS[format])
+    response.headers['Content-Disposition'] = 'attachment; filename=%s.%s' % (name, format)
+    return response
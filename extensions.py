@@ -0,0 +1,33 @@
+from flask_moment import Moment
+from flask_sqlalchemy import SQLAlchemy
+
+from assets import Assets
+from cache import ResponseCache
+from instrumentation import Instrumentation
+from replicas import Replicas, RoutingSession
+from templating import Templates
+from writes import Writes
+
+#----------------------------------------------------------------------------#
+# Extensions.
+#----------------------------------------------------------------------------#
+
+# Created unbound and bound to an app by create_app(), so importing the
+# models or the blueprints neither reads the config nor touches a database.
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+replicas = Replicas()
+moment = Moment()
+assets = Assets()
+cache = ResponseCache()
+templates = Templates()
+writes = Writes()
+instrumentation = Instrumentation()
+instrumentation.add_metric('fyyur_response_cache_hits_total', 'counter',
+                           'Pages served from the response cache.', lambda: cache.hits)
+instrumentation.add_metric('fyyur_response_cache_misses_total', 'counter',
+                           'Cacheable pages rendered because they were not cached.', lambda: cache.misses)
+instrumentation.add_metric('fyyur_show_tile_hits_total', 'counter',
+                           'Show tiles served from the fragment cache.', lambda: templates.hits)
+instrumentation.add_metric('fyyur_show_tile_misses_total', 'counter',
+                           'Show tiles rendered because they were not cached.', lambda: templates.misses)
@@ -1,3 +1,5 @@
+import os
+
 from fabric.api import local, settings, abort
 from fabric.contrib.console import confirm
 
@@ -13,6 +15,21 @@ def test():
         abort("Aborted at user request.")
 
 
+def bench():
+    # timings only compare on one machine and catalog, so the baseline is
+    # not committed: the first run writes it, later runs compare against it
+    # (delete it to start over after reseeding); the same goes for the
+    # startup baseline
+    if os.path.exists("benchmarks/baseline.json"):
+        local("python -m benchmarks.run --compare benchmarks/baseline.json")
+    else:
+        local("python -m benchmarks.run --output benchmarks/baseline.json")
+    if os.path.exists("benchmarks/startup.json"):
+        local("python -m benchmarks.startup --compare benchmarks/startup.json")
+    else:
+        local("python -m benchmarks.startup --output benchmarks/startup.json")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
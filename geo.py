@@ -0,0 +1,141 @@
+import heapq
+import math
+from collections import namedtuple
+from operator import itemgetter
+
+from indexes import InProcessIndex
+
+#----------------------------------------------------------------------------#
+# Nearby.
+#----------------------------------------------------------------------------#
+
+# Venues are found by distance from a point. On PostgreSQL the query runs
+# against a GiST index over ll_to_earth(latitude, longitude) (cube and
+# earthdistance, see the venue location migration): earth_box() narrows it
+# to the radius and the index returns the rows nearest first (<->). On any
+# other database an in-process k-d tree of the located venues is kept per
+# model and rebuilt after writes (see indexes.py).
+#
+# Both work on points of the earth in 3D: the straight-line distance
+# between two of them grows with the distance along the surface, so the
+# nearest by one are the nearest by the other.
+
+EARTH_RADIUS_KM = 6371.0088
+
+NearbyResult = namedtuple('NearbyResult', ['id', 'distance'])
+
+
+def to_xyz(latitude, longitude):
+    # on the unit sphere
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (math.cos(latitude) * math.cos(longitude),
+            math.cos(latitude) * math.sin(longitude),
+            math.sin(latitude))
+
+
+def chord(km):
+    # the straight-line distance, on the unit sphere, of `km` along the surface
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def surface_km(chord):
+    return 2 * math.asin(min(chord / 2, 1.0)) * EARTH_RADIUS_KM
+
+
+class KDTree(object):
+    # a balanced tree laid out in one list: the point at the middle of a
+    # range splits it on axis depth % 3, no node objects
+
+    def __init__(self, points):
+        # points: (x, y, z, id) tuples
+        self.points = list(points)
+        self._build(0, len(self.points), 0)
+
+    def _build(self, lo, hi, axis):
+        if hi - lo < 2:
+            return
+        self.points[lo:hi] = sorted(self.points[lo:hi], key=itemgetter(axis))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, (axis + 1) % 3)
+        self._build(mid + 1, hi, (axis + 1) % 3)
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, point, k, max_distance):
+        # -> [(distance, id)] of the k points nearest to `point`, no further
+        # than max_distance, nearest first
+        points = self.points
+        qx, qy, qz = point
+        query = (qx, qy, qz)
+        # a max-heap of the best k so far, as (-squared distance, id)
+        best = []
+        bound = [max_distance * max_distance]
+
+        def search(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            x, y, z, id = points[mid]
+            d = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+            if d <= bound[0]:
+                if len(best) < k:
+                    heapq.heappush(best, (-d, id))
+                else:
+                    heapq.heappushpop(best, (-d, id))
+                if len(best) == k:
+                    bound[0] = min(bound[0], -best[0][0])
+            diff = query[axis] - points[mid][axis]
+            following = (axis + 1) % 3
+            if diff < 0:
+                search(lo, mid, following)
+                if diff * diff <= bound[0]:
+                    search(mid + 1, hi, following)
+            else:
+                search(mid + 1, hi, following)
+                if diff * diff <= bound[0]:
+                    search(lo, mid, following)
+
+        if k > 0:
+            search(0, len(points), 0)
+        return sorted((math.sqrt(-d), id) for d, id in best)
+
+
+class Nearby(InProcessIndex):
+
+    def __init__(self, db, model, generations=None):
+        super(Nearby, self).__init__(db, model, 'nearby:' + model.__tablename__, generations)
+
+    def located(self):
+        # live rows with a location; the predicate of the PostgreSQL index
+        model = self.model
+        return (model.latitude.isnot(None), model.longitude.isnot(None), model.deleted_at.is_(None))
+
+    def nearest(self, latitude, longitude, radius_km, limit):
+        # -> NearbyResults, nearest first, distance in km
+        if self.db.engine.dialect.name == 'postgresql':
+            return self._nearest_postgres(latitude, longitude, radius_km, limit)
+        return self._nearest_in_process(latitude, longitude, radius_km, limit)
+
+    def _nearest_postgres(self, latitude, longitude, radius_km, limit):
+        model = self.model
+        func = self.db.func
+        origin = func.ll_to_earth(latitude, longitude)
+        location = func.ll_to_earth(model.latitude, model.longitude)
+        distance = func.earth_distance(origin, location)
+        rows = self.db.session.query(model.id, distance.label('distance'))\
+            .filter(*self.located())\
+            .filter(func.earth_box(origin, radius_km * 1000).op('@>')(location),
+                    distance <= radius_km * 1000)\
+            .order_by(location.op('<->')(origin)).limit(limit)
+        return [NearbyResult(row.id, row.distance / 1000.0) for row in rows]
+
+    def _nearest_in_process(self, latitude, longitude, radius_km, limit):
+        tree = self.index()
+        return [NearbyResult(id, surface_km(distance)) for distance, id in
+                tree.nearest(to_xyz(latitude, longitude), limit, chord(radius_km))]
+
+    def _build(self):
+        model = self.model
+        rows = self.db.session.query(model.id, model.latitude, model.longitude).filter(*self.located())
+        return KDTree(to_xyz(row.latitude, row.longitude) + (row.id,) for row in rows)
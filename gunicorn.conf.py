@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+
+# gunicorn wsgi:app picks this file up from the working directory.
+
+bind = os.environ.get('BIND', '0.0.0.0:%s' % os.environ.get('PORT', '8000'))
+
+# Processes scale across cores; threads cover the time a request spends
+# waiting on postgres. config.py sizes each worker's connection pool to
+# GUNICORN_THREADS.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# restart workers now and then so a slow leak cannot grow without bound
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+
+
+def on_starting(server):
+    # compile every template into the bytecode cache the workers share,
+    # once, before they are forked (see templating.py)
+    from app import create_app
+    from extensions import cache, templates
+    app = create_app(migrations=False)
+    server.log.info('%d templates compiled', templates.compile_all(app))
+    if workers > 1 and cache.backend is not None and not cache.shared:
+        server.log.warning('CACHE_BACKEND=%s is per worker: a write invalidates the cached pages '
+                           'of its own worker only; set CACHE_BACKEND=redis and CACHE_REDIS_URL',
+                           app.config['CACHE_BACKEND'])
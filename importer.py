@@ -0,0 +1,315 @@
+import csv
+import json
+import re
+import time
+
+from werkzeug.datastructures import MultiDict
+
+from bookings import DEFAULT_DURATION, booking_error
+from forms import ArtistForm, ShowForm, VenueForm
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+# Rows are streamed from CSV or JSON Lines, validated by the same form the
+# create page uses (one form instance re-processed per row), and inserted in
+# batches with a single executemany per batch instead of an add + commit per
+# row. A batch the database refuses is retried row by row so only the bad
+# rows are rejected.
+
+
+def read_rows(stream, format):
+    # yields (line number, dict) pairs
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'__error__': 'invalid JSON: %s' % e}
+            yield line_num, row
+
+
+def to_formdata(row, list_fields=()):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if value is None or value is False:
+            continue
+        if key in list_fields:
+            values = value if isinstance(value, list) else re.split(r'\s*[,;]\s*', value)
+            for item in values:
+                if item:
+                    formdata.add(key, item)
+        elif value is True:
+            formdata.add(key, 'y')
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+class ImportReport(object):
+
+    def __init__(self, kind, action='inserted'):
+        self.kind = kind
+        self.action = action
+        self.rows = 0
+        self.inserted = 0
+        self.rejected = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def reject(self, line_num, row, errors):
+        self.rejected.append({'line': line_num, 'row': row, 'errors': errors})
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return '%s: %d rows, %d %s, %d rejected in %.2fs (%.0f rows/s)' % (
+            self.kind, self.rows, self.inserted, self.action, len(self.rejected),
+            self.seconds, self.rows_per_second)
+
+
+class Importer(object):
+    kind = None
+    form_class = None
+    list_fields = ()
+
+    def __init__(self, db, model, batch_size=1000):
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.form = self.form_class(meta={'csrf': False})
+
+    def validate(self, row):
+        # -> (column values, None) or (None, errors)
+        if '__error__' in row:
+            return None, {'row': [row['__error__']]}
+        self.form.process(formdata=to_formdata(row, self.list_fields))
+        if not self.form.validate():
+            return None, self.form.errors
+        return self.columns(self.form.data), None
+
+    def columns(self, data):
+        return dict((column.key, data[column.key]) for column in self.model.__table__.columns
+                    if column.key in data)
+
+    def run(self, rows):
+        report = ImportReport(self.kind)
+        batch = []
+        for line_num, row in rows:
+            report.rows += 1
+            values, errors = self.validate(row)
+            if errors:
+                report.reject(line_num, row, errors)
+                continue
+            batch.append((line_num, row, values))
+            if len(batch) >= self.batch_size:
+                self.flush(batch, report)
+                batch = []
+        if batch:
+            self.flush(batch, report)
+        report.finish()
+        return report
+
+    def flush(self, batch, report):
+        session = self.db.session
+        table = self.model.__table__
+        try:
+            session.execute(table.insert(), [values for _, _, values in batch])
+            session.commit()
+            report.inserted += len(batch)
+        except Exception:
+            session.rollback()
+            for line_num, row, values in batch:
+                try:
+                    session.execute(table.insert(), [values])
+                    session.commit()
+                    report.inserted += 1
+                except Exception as e:
+                    session.rollback()
+                    report.reject(line_num, row, {'database': [str(e.__cause__ or e).strip()]})
+
+
+class VenueImporter(Importer):
+    kind = 'venues'
+    form_class = VenueForm
+    list_fields = ('genres',)
+
+
+class ArtistImporter(Importer):
+    kind = 'artists'
+    form_class = ArtistForm
+    list_fields = ('genres',)
+
+
+class ShowImporter(Importer):
+    kind = 'shows'
+    form_class = ShowForm
+
+    def __init__(self, db, model, artist_model, venue_model, batch_size=1000, bookings=None):
+        super(ShowImporter, self).__init__(db, model, batch_size)
+        # artists and venues are resolved from memory, by id or by name,
+        # instead of a lookup per row
+        self.artists = self.references(artist_model)
+        self.venues = self.references(venue_model)
+        # a bookings.BookingIndex: rows double-booking a venue or an artist,
+        # in the catalog or earlier in the file, are rejected
+        self.bookings = bookings
+
+    def references(self, model):
+        ids = set()
+        names = {}
+        for row in self.db.session.query(model.id, model.name).filter(model.deleted_at.is_(None)):
+            ids.add(row.id)
+            key = row.name.strip().lower()
+            # a name shared by two rows cannot be resolved
+            names[key] = None if key in names else row.id
+        return ids, names
+
+    def resolve(self, row, field, references):
+        ids, names = references
+        value = row.get(field + '_id')
+        if value not in (None, ''):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None, 'not an id: %r' % value
+            return (value, None) if value in ids else (None, 'no such id: %d' % value)
+        name = row.get(field + '_name') or row.get(field)
+        if not name:
+            return None, 'missing %s_id or %s_name' % (field, field)
+        value = names.get(name.strip().lower(), False)
+        if value is False:
+            return None, 'no such name: %r' % name
+        if value is None:
+            return None, 'ambiguous name: %r' % name
+        return value, None
+
+    def validate(self, row):
+        # the form would fall back to its default of today
+        if '__error__' not in row and not row.get('start_time'):
+            return None, {'start_time': ['This field is required.']}
+        values, errors = super(ShowImporter, self).validate(row)
+        if errors:
+            return None, errors
+        errors = {}
+        for field, references in (('artist', self.artists), ('venue', self.venues)):
+            values[field + '_id'], error = self.resolve(row, field, references)
+            if error:
+                errors[field + '_id'] = [error]
+        if errors:
+            return None, errors
+        return self.book(values)
+
+    def book(self, values):
+        start, end = values['start_time'], values.get('end_time')
+        if end is None:
+            end = values['end_time'] = start + DEFAULT_DURATION
+        error = booking_error(start, end)
+        if error:
+            return None, {'end_time': [error]}
+        if self.bookings is not None:
+            field, booked = self.bookings.conflict(values['venue_id'], values['artist_id'], start, end)
+            if field:
+                return None, {field: ['already booked from %s to %s' % booked]}
+            self.bookings.add(values['venue_id'], values['artist_id'], start, end)
+        return values, None
+
+
+#----------------------------------------------------------------------------#
+# Geocoding.
+#----------------------------------------------------------------------------#
+
+# `flask geocode-venues` sets the latitude and longitude of venues from a
+# local file geocoded offline: rows of latitude and longitude with either
+# the venue's id or its address, city and state. Venues are updated in
+# batches, one executemany per batch.
+
+
+def address_key(address, city, state):
+    return tuple(' '.join((part or '').lower().split()) for part in (address, city, state))
+
+
+class VenueGeocoder(object):
+
+    def __init__(self, db, model, batch_size=1000):
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.ids = set()
+        self.addresses = {}
+        for row in db.session.query(model.id, model.address, model.city, model.state)\
+                .filter(model.deleted_at.is_(None)):
+            self.ids.add(row.id)
+            key = address_key(row.address, row.city, row.state)
+            # an address shared by two venues cannot be resolved
+            self.addresses[key] = None if key in self.addresses else row.id
+
+    def validate(self, row):
+        # -> ({'id', 'latitude', 'longitude'}, None) or (None, errors)
+        if '__error__' in row:
+            return None, {'row': [row['__error__']]}
+        errors = {}
+        values = {}
+        for field, limit in (('latitude', 90), ('longitude', 180)):
+            try:
+                values[field] = float(row.get(field))
+                if not -limit <= values[field] <= limit:
+                    errors[field] = ['not within [-%d, %d]' % (limit, limit)]
+            except (TypeError, ValueError):
+                errors[field] = ['not a number: %r' % (row.get(field),)]
+        id = row.get('id') or row.get('venue_id')
+        if id not in (None, ''):
+            try:
+                values['id'] = int(id)
+            except (TypeError, ValueError):
+                errors['id'] = ['not an id: %r' % (id,)]
+            else:
+                if values['id'] not in self.ids:
+                    errors['id'] = ['no such id: %d' % values['id']]
+        else:
+            values['id'] = self.addresses.get(address_key(row.get('address'), row.get('city'), row.get('state')), False)
+            if values['id'] is False:
+                errors['address'] = ['no venue at this address, city and state']
+            elif values['id'] is None:
+                errors['address'] = ['more than one venue at this address, city and state']
+        if errors:
+            return None, errors
+        return values, None
+
+    def run(self, rows):
+        report = ImportReport('venues', 'located')
+        batch = []
+        for line_num, row in rows:
+            report.rows += 1
+            values, errors = self.validate(row)
+            if errors:
+                report.reject(line_num, row, errors)
+                continue
+            batch.append(values)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, report)
+                batch = []
+        if batch:
+            self.flush(batch, report)
+        report.finish()
+        return report
+
+    def flush(self, batch, report):
+        # an UPDATE by primary key per row, in one executemany
+        self.db.session.execute(self.db.update(self.model), batch)
+        self.db.session.commit()
+        report.inserted += len(batch)
+
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+
+#----------------------------------------------------------------------------#
+# In-process indexes.
+#----------------------------------------------------------------------------#
+
+# Without PostgreSQL, the venue and artist searches (search.py) and the
+# nearest venues (geo.py) are answered from an index each worker process
+# builds from its table on first use. A session that flushes a change to
+# the table drops the index of its own process when it commits, so no
+# index is built from a write that is rolled back. Bulk query updates
+# (soft deletes, the flask commands) call invalidate() themselves.
+#
+# invalidate() also bumps a generation counter in the response cache, and
+# every use compares the index against it, so with a shared cache
+# (CACHE_BACKEND=redis) all workers rebuild after a write in any process.
+# A per-process cache cannot carry that, so an index older than
+# IN_PROCESS_INDEX_MAX_AGE seconds is rebuilt as well.
+
+
+class InProcessIndex(object):
+    # subclasses build the index in _build()
+
+    def __init__(self, db, model, name, generations=None):
+        # generations: the ResponseCache holding the shared counter `name`
+        self.db = db
+        self.model = model
+        self.name = name
+        self.generations = generations
+        # (index, shared generation, time.monotonic() when built)
+        self._built = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        event.listen(db.session, 'after_flush', self._after_flush)
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._after_rollback)
+
+    def _after_flush(self, session, flush_context):
+        # new, dirty and deleted still hold what was just flushed
+        if any(isinstance(instance, self.model)
+               for instance in (*session.new, *session.dirty, *session.deleted)):
+            session.info.setdefault('indexes_changed', set()).add(self.name)
+
+    def _after_commit(self, session):
+        changed = session.info.get('indexes_changed')
+        if changed and self.name in changed:
+            changed.discard(self.name)
+            self.invalidate()
+
+    def _after_rollback(self, session):
+        session.info.get('indexes_changed', set()).discard(self.name)
+
+    def invalidate(self, *args):
+        self._generation += 1
+        self._built = None
+        if self.generations is not None:
+            self.generations.invalidate(self.name)
+
+    def _shared_generation(self):
+        if self.generations is None:
+            return 0
+        return self.generations.generation(self.name)
+
+    def _fresh(self, built, shared):
+        if built is None or built[1] != shared:
+            return False
+        max_age = current_app.config.get('IN_PROCESS_INDEX_MAX_AGE')
+        return not max_age or time.monotonic() - built[2] < max_age
+
+    def index(self):
+        shared = self._shared_generation()
+        built = self._built
+        if not self._fresh(built, shared):
+            with self._lock:
+                built = self._built
+                if not self._fresh(built, shared):
+                    generation = self._generation
+                    built = (self._build(), shared, time.monotonic())
+                    # a write during the build leaves the index to the next use
+                    if generation == self._generation:
+                        self._built = built
+        return built[0]
+
+    def _build(self):
+        raise NotImplementedError
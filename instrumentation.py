@@ -0,0 +1,231 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, g, has_app_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Instrumentation.
+#----------------------------------------------------------------------------#
+
+# Every request records its query count, database time, template render time
+# and its slowest statements. They are sent back in a Server-Timing header,
+# summed into per-process counters served as Prometheus text at /metrics,
+# and a request whose slowest statement crosses SLOW_QUERY_THRESHOLD_MS is
+# written to the slow query log as one JSON line.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOWEST_KEPT = 5
+
+
+class RequestMetrics(object):
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.render_started = []
+        self.slowest = []
+
+    def record_query(self, statement, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: -item[0])
+            del self.slowest[SLOWEST_KEPT:]
+
+
+class Instrumentation(object):
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.durations = {}
+        self.db_queries = {}
+        self.db_seconds = {}
+        self.render_seconds = {}
+        self.slow_requests = 0
+        self.extra_metrics = []
+        self.threshold = 0.1
+        self.server_timing = True
+        self.slow_log = logging.getLogger('fyyur.slow_queries')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000.0
+        self.server_timing = app.config.get('SERVER_TIMING', True)
+        path = app.config.get('SLOW_QUERY_LOG')
+        if path and not self.slow_log.handlers:
+            # opened on the first slow query, not by every process (CLI commands)
+            handler = logging.FileHandler(path, delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.slow_log.addHandler(handler)
+            self.slow_log.setLevel(logging.INFO)
+            self.slow_log.propagate = False
+
+        # on the Engine class, so every engine the app creates is covered;
+        # once per process however many apps are created
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['instrumentation'] = self
+
+    def add_metric(self, name, kind, help, read):
+        # `read` returns a number or a {labels tuple: number} dict at scrape time
+        self.extra_metrics.append((name, kind, help, read))
+
+    #  Hooks
+    #  ----------------------------------------------------------------
+
+    def _current(self):
+        return g.get('_request_metrics') if has_app_context() else None
+
+    def _before_request(self):
+        g._request_metrics = RequestMetrics()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        seconds = time.perf_counter() - started
+        metrics = self._current()
+        if metrics is not None:
+            metrics.record_query(statement, seconds)
+        elif seconds >= self.threshold:
+            # outside a request (CLI commands, workers): log right away
+            self._log_slow({'statement': statement, 'ms': round(seconds * 1000, 3)})
+
+    def _before_render(self, app, template, context, **extra):
+        metrics = self._current()
+        if metrics is not None:
+            metrics.render_started.append(time.perf_counter())
+
+    def _after_render(self, app, template, context, **extra):
+        metrics = self._current()
+        if metrics is not None and metrics.render_started:
+            metrics.render_seconds += time.perf_counter() - metrics.render_started.pop()
+
+    def _after_request(self, response):
+        metrics = g.pop('_request_metrics', None)
+        if metrics is None:
+            return response
+        total = time.perf_counter() - metrics.started
+        endpoint = request.endpoint or 'unmatched'
+        key = (endpoint, request.method, str(response.status_code))
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            buckets = self.durations.setdefault(endpoint, [0] * (len(DURATION_BUCKETS) + 1) + [0.0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            buckets[-2] += 1
+            buckets[-1] += total
+            self.db_queries[endpoint] = self.db_queries.get(endpoint, 0) + metrics.queries
+            self.db_seconds[endpoint] = self.db_seconds.get(endpoint, 0.0) + metrics.db_seconds
+            self.render_seconds[endpoint] = self.render_seconds.get(endpoint, 0.0) + metrics.render_seconds
+
+        if self.server_timing:
+            response.headers.add('Server-Timing', 'db;dur=%.2f;desc="%d queries"' % (
+                metrics.db_seconds * 1000, metrics.queries))
+            response.headers.add('Server-Timing', 'render;dur=%.2f' % (metrics.render_seconds * 1000))
+            response.headers.add('Server-Timing', 'total;dur=%.2f' % (total * 1000))
+
+        if metrics.slowest and metrics.slowest[0][0] >= self.threshold:
+            with self._lock:
+                self.slow_requests += 1
+            self._log_slow({
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_seconds * 1000, 3),
+                'render_ms': round(metrics.render_seconds * 1000, 3),
+                'total_ms': round(total * 1000, 3),
+                'slowest': [{'ms': round(seconds * 1000, 3), 'statement': statement}
+                            for seconds, statement in metrics.slowest],
+            })
+        return response
+
+    def _log_slow(self, record):
+        record['time'] = datetime.utcnow().isoformat() + 'Z'
+        self.slow_log.info(json.dumps(record, sort_keys=True))
+
+    #  Prometheus text exposition
+    #  ----------------------------------------------------------------
+
+    def metrics_view(self):
+        return Response(self.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    def render_metrics(self):
+        lines = []
+
+        def family(name, kind, help):
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s %s' % (name, kind))
+
+        def sample(name, labels, value):
+            if labels:
+                label_text = ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                                      for k, v in labels)
+                lines.append('%s{%s} %s' % (name, label_text, value))
+            else:
+                lines.append('%s %s' % (name, value))
+
+        with self._lock:
+            requests = dict(self.requests)
+            durations = dict((k, list(v)) for k, v in self.durations.items())
+            db_queries = dict(self.db_queries)
+            db_seconds = dict(self.db_seconds)
+            render_seconds = dict(self.render_seconds)
+            slow_requests = self.slow_requests
+
+        family('fyyur_requests_total', 'counter', 'Requests served.')
+        for (endpoint, method, status), value in sorted(requests.items()):
+            sample('fyyur_requests_total', [('endpoint', endpoint), ('method', method), ('status', status)], value)
+
+        family('fyyur_request_duration_seconds', 'histogram', 'Request latency.')
+        for endpoint, buckets in sorted(durations.items()):
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                sample('fyyur_request_duration_seconds_bucket', [('endpoint', endpoint), ('le', bound)], count)
+            sample('fyyur_request_duration_seconds_bucket', [('endpoint', endpoint), ('le', '+Inf')], buckets[-2])
+            sample('fyyur_request_duration_seconds_count', [('endpoint', endpoint)], buckets[-2])
+            sample('fyyur_request_duration_seconds_sum', [('endpoint', endpoint)], '%.6f' % buckets[-1])
+
+        family('fyyur_db_queries_total', 'counter', 'SQL statements executed while serving requests.')
+        for endpoint, value in sorted(db_queries.items()):
+            sample('fyyur_db_queries_total', [('endpoint', endpoint)], value)
+
+        family('fyyur_db_seconds_total', 'counter', 'Time spent in SQL statements while serving requests.')
+        for endpoint, value in sorted(db_seconds.items()):
+            sample('fyyur_db_seconds_total', [('endpoint', endpoint)], '%.6f' % value)
+
+        family('fyyur_template_render_seconds_total', 'counter', 'Time spent rendering templates.')
+        for endpoint, value in sorted(render_seconds.items()):
+            sample('fyyur_template_render_seconds_total', [('endpoint', endpoint)], '%.6f' % value)
+
+        family('fyyur_slow_requests_total', 'counter', 'Requests with a statement over the slow query threshold.')
+        sample('fyyur_slow_requests_total', [], slow_requests)
+
+        for name, kind, help, read in self.extra_metrics:
+            family(name, kind, help)
+            value = read()
+            if isinstance(value, dict):
+                for labels, item in sorted(value.items()):
+                    sample(name, labels, item)
+            else:
+                sample(name, [], value)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,53 @@
+"""show end_time; no overlapping bookings of a venue or an artist
+
+Revision ID: 3b9d0f7e15ac
+Revises: e7a1d94c0b52
+Create Date: 2026-10-18 15:21:07.412093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d0f7e15ac'
+down_revision = 'e7a1d94c0b52'
+branch_labels = None
+depends_on = None
+
+CONSTRAINTS = (('show_venue_no_overlap', 'venue_id'), ('show_artist_no_overlap', 'artist_id'))
+
+
+def upgrade():
+    op.add_column('show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # two hours, cut short where the next show of the venue or the
+        # artist starts, so existing shows satisfy the constraints below
+        op.execute(
+            "UPDATE show SET end_time = ends.end_time FROM ("
+            "SELECT id, LEAST(start_time + interval '2 hours', "
+            "lead(start_time) OVER (PARTITION BY venue_id ORDER BY start_time, id), "
+            "lead(start_time) OVER (PARTITION BY artist_id ORDER BY start_time, id)) AS end_time "
+            "FROM show) AS ends WHERE show.id = ends.id")
+        # a show starting together with another of its venue or artist
+        # gets an empty range, which overlaps nothing: list those with
+        # SELECT * FROM show WHERE end_time = start_time
+    else:
+        op.execute("UPDATE show SET end_time = datetime(start_time, '+2 hours')")
+    op.alter_column('show', 'end_time', nullable=False)
+    if bind.dialect.name == 'postgresql':
+        op.create_check_constraint('show_end_after_start', 'show', 'end_time >= start_time')
+        op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        for name, column in CONSTRAINTS:
+            op.execute('ALTER TABLE show ADD CONSTRAINT {name} EXCLUDE USING gist '
+                       '({column} WITH =, tsrange(start_time, end_time) WITH &&)'
+                       .format(name=name, column=column))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in CONSTRAINTS:
+            op.drop_constraint(name, 'show')
+        op.drop_constraint('show_end_after_start', 'show')
+    op.drop_column('show', 'end_time')
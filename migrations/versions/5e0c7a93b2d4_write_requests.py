@@ -0,0 +1,32 @@
+"""write_request: outcomes of submissions by idempotency key
+
+Revision ID: 5e0c7a93b2d4
+Revises: 8c2f4e61d9b7
+Create Date: 2026-10-18 18:40:12.530871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0c7a93b2d4'
+down_revision = '8c2f4e61d9b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('write_request',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('operation', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('write_request')
@@ -0,0 +1,38 @@
+"""show.id alone is the primary key of show
+
+Revision ID: 6b1e9d04c7a2
+Revises: a4e6c2d97f18
+Create Date: 2026-10-19 09:41:26.318554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e9d04c7a2'
+down_revision = 'a4e6c2d97f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (id, venue_id, artist_id) -> (id); venue_id and artist_id keep their
+    # foreign keys and indexes. On SQLite the table is copied, and id
+    # becomes the rowid, numbered by the database like the serial column
+    # on PostgreSQL.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('show_pkey', 'show', type_='primary')
+        op.create_primary_key('show_pkey', 'show', ['id'])
+    else:
+        with op.batch_alter_table('show', recreate='always') as batch_op:
+            batch_op.create_primary_key('show_pkey', ['id'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('show_pkey', 'show', type_='primary')
+        op.create_primary_key('show_pkey', 'show', ['id', 'venue_id', 'artist_id'])
+    else:
+        with op.batch_alter_table('show', recreate='always') as batch_op:
+            batch_op.create_primary_key('show_pkey', ['id', 'venue_id', 'artist_id'])
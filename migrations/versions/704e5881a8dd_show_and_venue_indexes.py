@@ -0,0 +1,28 @@
+"""indexes on the show and venue hot columns
+
+Revision ID: 704e5881a8dd
+Revises: ed35ccb1afab
+Create Date: 2026-10-18 10:02:17.480391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '704e5881a8dd'
+down_revision = 'ed35ccb1afab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_venue_id_start_time', 'show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'show', ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_venue_city_state', 'venue', ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_venue_city_state', table_name='venue')
+    op.drop_index('ix_show_artist_id_start_time', table_name='show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='show')
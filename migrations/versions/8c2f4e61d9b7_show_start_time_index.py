@@ -0,0 +1,23 @@
+"""index shows by (start_time, id) for date-range listings
+
+Revision ID: 8c2f4e61d9b7
+Revises: 3b9d0f7e15ac
+Create Date: 2026-10-18 16:02:44.915230
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2f4e61d9b7'
+down_revision = '3b9d0f7e15ac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_start_time_id', 'show', ['start_time', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
@@ -0,0 +1,25 @@
+"""write_request.request_hash, to reject a key reused for another request
+
+Revision ID: 9d4a7f3e2b61
+Revises: 6b1e9d04c7a2
+Create Date: 2026-10-19 10:27:53.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4a7f3e2b61'
+down_revision = '6b1e9d04c7a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # left empty on the existing rows, which are then matched by operation only
+    op.add_column('write_request', sa.Column('request_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('write_request', 'request_hash')
@@ -0,0 +1,24 @@
+"""index write_request on created_at, for purging the old keys
+
+Revision ID: a4e6c2d97f18
+Revises: d83b5f1c6e20
+Create Date: 2026-10-18 23:12:40.508613
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e6c2d97f18'
+down_revision = 'd83b5f1c6e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_write_request_created_at', 'write_request', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_write_request_created_at', table_name='write_request')
@@ -0,0 +1,34 @@
+"""deleted_at on venue and artist: deletes are marked, then purged
+
+Revision ID: b61f3d8a2c57
+Revises: 5e0c7a93b2d4
+Create Date: 2026-10-18 19:21:37.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61f3d8a2c57'
+down_revision = '5e0c7a93b2d4'
+branch_labels = None
+depends_on = None
+
+# show.venue_id and show.artist_id have been ON DELETE CASCADE since the
+# show table was created, so purging needs no change to them
+
+
+def upgrade():
+    for table in ('venue', 'artist'):
+        # nullable and without a default: no table rewrite
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        # only the deleted rows, for `flask purge-deleted`
+        op.create_index('ix_%s_deleted_at' % table, table, ['deleted_at'],
+                        postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    for table in ('venue', 'artist'):
+        op.drop_index('ix_%s_deleted_at' % table, table_name=table)
+        op.drop_column(table, 'deleted_at')
@@ -0,0 +1,44 @@
+"""upcoming and past show counters on venue and artist
+
+Revision ID: c4b8e21f6a93
+Revises: 704e5881a8dd
+Create Date: 2026-10-18 11:20:05.613027
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4b8e21f6a93'
+down_revision = '704e5881a8dd'
+branch_labels = None
+depends_on = None
+
+COUNTED = (('venue', 'venue_id'), ('artist', 'artist_id'))
+
+
+def upgrade():
+    for table, _ in COUNTED:
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('show_counts_at', sa.DateTime(), nullable=True))
+
+    # the app compares naive UTC datetimes, so count as of utcnow() here too
+    now = datetime.utcnow()
+    for table, foreign_key in COUNTED:
+        op.get_bind().execute(sa.text(
+            'UPDATE {table} SET '
+            'upcoming_shows_count = (SELECT count(*) FROM show WHERE show.{fk} = {table}.id AND show.start_time > :now), '
+            'past_shows_count = (SELECT count(*) FROM show WHERE show.{fk} = {table}.id AND show.start_time <= :now), '
+            'show_counts_at = :now'.format(table=table, fk=foreign_key)), {'now': now})
+        op.alter_column(table, 'show_counts_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table, _ in COUNTED:
+        op.drop_column(table, 'show_counts_at')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
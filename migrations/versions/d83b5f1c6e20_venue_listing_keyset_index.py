@@ -0,0 +1,29 @@
+"""index the venues listing on its keyset, (city, state, id)
+
+Revision ID: d83b5f1c6e20
+Revises: f2a7c4e9b318
+Create Date: 2026-10-18 22:41:09.315207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83b5f1c6e20'
+down_revision = 'f2a7c4e9b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (city, state) alone left every page past the first to sort the rows of
+    # an area by id; the new index covers the whole ORDER BY and its prefix
+    # answers everything the old one did
+    op.create_index('ix_venue_city_state_id', 'venue', ['city', 'state', 'id'], unique=False)
+    op.drop_index('ix_venue_city_state', table_name='venue')
+
+
+def downgrade():
+    op.create_index('ix_venue_city_state', 'venue', ['city', 'state'], unique=False)
+    op.drop_index('ix_venue_city_state_id', table_name='venue')
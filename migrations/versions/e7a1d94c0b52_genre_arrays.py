@@ -0,0 +1,62 @@
+"""genres as varchar[] with GIN indexes; venue state index
+
+Revision ID: e7a1d94c0b52
+Revises: c4b8e21f6a93
+Create Date: 2026-10-18 12:04:51.238760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1d94c0b52'
+down_revision = 'c4b8e21f6a93'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist')
+
+
+def legacy_genres(chars):
+    # a list or a '{A,"B c"}' literal that went through the array type one
+    # character at a time: ['{', 'J', 'a', 'z', 'z', '}'] -> ['Jazz']
+    text = ''.join(chars)
+    if text.startswith('{') and text.endswith('}'):
+        text = text[1:-1]
+    return [genre.strip().strip('"') for genre in text.split(',') if genre.strip()]
+
+
+def upgrade():
+    op.create_index('ix_venue_state_city_id', 'venue', ['state', 'city', 'id'])
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    for table in TABLES:
+        column = [c for c in inspector.get_columns(table) if c['name'] == 'genres'][0]
+        if not isinstance(column['type'], ARRAY):
+            # a varchar holding an array literal ('{Jazz,"Rock n Roll"}') or
+            # a comma separated list
+            op.execute(
+                "ALTER TABLE {table} ALTER COLUMN genres TYPE VARCHAR[] USING "
+                "CASE WHEN genres LIKE '{{%}}' THEN genres::VARCHAR[] "
+                "ELSE string_to_array(genres, ',') END".format(table=table))
+        else:
+            rows = bind.execute(sa.text(
+                'SELECT id, genres FROM {table} WHERE cardinality(genres) > 0 '
+                'AND 1 = ALL (SELECT length(genre) FROM unnest(genres) AS genre)'.format(table=table)))
+            for id, genres in rows.fetchall():
+                bind.execute(sa.text('UPDATE {table} SET genres = CAST(:genres AS VARCHAR[]) '
+                                     'WHERE id = :id'.format(table=table)),
+                             {'genres': legacy_genres(genres), 'id': id})
+        op.create_index('ix_%s_genres' % table, table, ['genres'], postgresql_using='gin')
+
+
+def downgrade():
+    # the columns stay arrays: the varchar form is what broke them
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in TABLES:
+            op.drop_index('ix_%s_genres' % table, table_name=table)
+    op.drop_index('ix_venue_state_city_id', table_name='venue')
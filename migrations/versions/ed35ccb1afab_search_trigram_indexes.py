@@ -0,0 +1,37 @@
+"""trigram search indexes on venue and artist
+
+Revision ID: ed35ccb1afab
+Revises: 99a3ab06dd62
+Create Date: 2026-10-18 09:12:44.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed35ccb1afab'
+down_revision = '99a3ab06dd62'
+branch_labels = None
+depends_on = None
+
+# must stay identical to search.search_text()
+SEARCH_TEXT = "(name || ' ' || city || ', ' || state)"
+
+
+def upgrade():
+    # pg_trgm only exists on PostgreSQL; other databases use the in-process
+    # index in search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('venue', 'artist'):
+        op.execute('CREATE INDEX ix_{0}_search_trgm ON {0} USING gin ({1} gin_trgm_ops)'
+                   .format(table, SEARCH_TEXT))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_artist_search_trgm', table_name='artist')
+    op.drop_index('ix_venue_search_trgm', table_name='venue')
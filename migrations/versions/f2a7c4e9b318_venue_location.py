@@ -0,0 +1,40 @@
+"""latitude and longitude on venue, indexed for nearest-venue searches
+
+Revision ID: f2a7c4e9b318
+Revises: b61f3d8a2c57
+Create Date: 2026-10-18 20:07:51.633092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c4e9b318'
+down_revision = 'b61f3d8a2c57'
+branch_labels = None
+depends_on = None
+
+# must stay identical to geo.Nearby.located() and the expression it searches
+LOCATION = 'll_to_earth(latitude, longitude)'
+LOCATED = 'latitude IS NOT NULL AND longitude IS NOT NULL AND deleted_at IS NULL'
+
+
+def upgrade():
+    op.add_column('venue', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('venue', sa.Column('longitude', sa.Float(), nullable=True))
+    # cube and earthdistance only exist on PostgreSQL; other databases use
+    # the in-process k-d tree in geo.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    op.execute('CREATE INDEX ix_venue_location ON venue USING gist ({0}) WHERE {1}'
+               .format(LOCATION, LOCATED))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_venue_location', table_name='venue')
+    op.drop_column('venue', 'longitude')
+    op.drop_column('venue', 'latitude')
@@ -0,0 +1,439 @@
+from datetime import datetime
+
+from bookings import DEFAULT_DURATION, MAX_DURATION
+from extensions import db, cache
+from geo import Nearby
+from search import Search
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+
+# a text[] on PostgreSQL; SQLite (development, tests) has no arrays and
+# stores the list as JSON
+GENRES = db.ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
+
+class Venue(db.Model):
+    __tablename__ = 'venue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    genres = db.Column(GENRES)
+    website = db.Column(db.String())
+    seeking_talent = db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.String())
+    # from `flask geocode-venues`; see geo.py
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    # the database deletes a venue's shows (ON DELETE CASCADE); the ORM
+    # leaves them to it instead of loading them
+    artists = db.relationship('Show', backref='venues', lazy=True, passive_deletes=True)
+    # DONE implement any missing fields, as a database migration using Flask-Migrate
+
+    # show counts as of show_counts_at; see Show counters below
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    show_counts_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # set when deleted, until `flask purge-deleted` removes the row
+    deleted_at = db.Column(db.DateTime)
+
+    # the venues listing groups and pages by area, keyset on (city, state, id),
+    # and filters on state and genre (array containment, answered from the GIN
+    # index)
+    __table_args__ = (
+        db.Index('ix_venue_city_state_id', 'city', 'state', 'id'),
+        db.Index('ix_venue_state_city_id', 'state', 'city', 'id'),
+        db.Index('ix_venue_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_venue_deleted_at', 'deleted_at', postgresql_where=db.text('deleted_at IS NOT NULL')),
+    )
+
+    def __repr__(self):
+        return f'<Venue {self.name} {self.city} {self.state}>'
+
+
+class Artist(db.Model):
+    __tablename__ = 'artist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    genres = db.Column(GENRES)
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+    website = db.Column(db.String())
+    seeking_venue = db.Column(db.Boolean, default=True)
+    seeking_description = db.Column(db.String())
+    venues = db.relationship('Show', backref='artists', lazy=True, passive_deletes=True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    show_counts_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_artist_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_artist_deleted_at', 'deleted_at', postgresql_where=db.text('deleted_at IS NOT NULL')),
+    )
+
+    def __repr__(self):
+        return f'<Artist {self.id} {self.name}>'
+
+    # DONE implement any missing fields, as a database migration using Flask-Migrate
+
+
+def default_end_time(context):
+    return context.get_current_parameters()['start_time'] + DEFAULT_DURATION
+
+
+# DONE Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+class Show(db.Model):
+    __tablename__ = 'show'
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey(
+        'venue.id', ondelete='CASCADE'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey(
+        'artist.id', ondelete='CASCADE'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False, default=default_end_time)
+
+    # venue and artist pages and calendars read a range of one venue's /
+    # artist's shows by time, the show listing a range of all shows in
+    # (start_time, id) order; on PostgreSQL two exclusion constraints keep a
+    # venue's and an artist's [start_time, end_time) ranges from overlapping
+    __table_args__ = (
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Show {self.venue_id} artistId: {self.artist_id} time: {self.start_time}'
+
+
+class WriteRequest(db.Model):
+    # the outcome of a create or edit submission under its idempotency key;
+    # see writes.py
+    __tablename__ = 'write_request'
+
+    key = db.Column(db.String(64), primary_key=True)
+    operation = db.Column(db.String(32), nullable=False)
+    # writes.values_hash() of the values the key was first submitted with
+    request_hash = db.Column(db.String(64))
+    status = db.Column(db.String(10), nullable=False)
+    entity_id = db.Column(db.Integer)
+    error = db.Column(db.String())
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # `flask purge-write-requests` removes the oldest
+    __table_args__ = (
+        db.Index('ix_write_request_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<WriteRequest {self.key} {self.operation} {self.status}>'
+
+
+venue_search = Search(db, Venue, cache)
+artist_search = Search(db, Artist, cache)
+venue_nearby = Nearby(db, Venue, cache)
+
+
+def invalidate_venue_pages(*venue_ids, artist_ids=()):
+    # the venues' own pages, every listing that shows their names or counts,
+    # and the pages of artists playing there
+    cache.invalidate('venues')
+    cache.invalidate('shows')
+    cache.invalidate('venue', *venue_ids)
+    if artist_ids:
+        cache.invalidate('artist', *artist_ids)
+
+
+def invalidate_artist_pages(*artist_ids, venue_ids=()):
+    cache.invalidate('artists')
+    cache.invalidate('shows')
+    cache.invalidate('artist', *artist_ids)
+    if venue_ids:
+        cache.invalidate('venue', *venue_ids)
+
+
+def show_artist_ids(*venue_ids):
+    return [row.artist_id for row in db.session.query(Show.artist_id)
+            .filter(Show.venue_id.in_(venue_ids)).distinct()]
+
+
+def show_venue_ids(*artist_ids):
+    return [row.venue_id for row in db.session.query(Show.venue_id)
+            .filter(Show.artist_id.in_(artist_ids)).distinct()]
+
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+# Venues and artists carry their upcoming and past show counts, so listings
+# never touch the show table. Adding or removing a show adjusts both sides
+# in the same transaction (count_show). Time turns upcoming shows into past
+# ones: `flask refresh-show-counters` recounts every venue and artist with a
+# show that started after its show_counts_at, and --full recounts them all.
+
+
+def count_show(venue_id, artist_id, start_time, delta=1, now=None):
+    # a show added (delta=1) or removed (delta=-1)
+    name = 'upcoming_shows_count' if start_time > (now or datetime.utcnow()) else 'past_shows_count'
+    for model, id in ((Venue, venue_id), (Artist, artist_id)):
+        column = getattr(model, name)
+        db.session.query(model).filter(model.id == id)\
+            .update({column: column + delta}, synchronize_session=False)
+
+
+def _show_counts(model, foreign_key, other, other_key, now):
+    # a show counts while the venue or artist on its other side is live
+    def count(condition):
+        return db.session.query(db.func.count(Show.id))\
+            .join(other, other.id == other_key)\
+            .filter(foreign_key == model.id, condition, live(other)).scalar_subquery()
+    return {model.upcoming_shows_count: count(Show.start_time > now),
+            model.past_shows_count: count(Show.start_time <= now),
+            model.show_counts_at: now}
+
+
+# (model, its key in show, the other side, its key in show)
+COUNTED = (
+    (Venue, Show.venue_id, Artist, Show.artist_id),
+    (Artist, Show.artist_id, Venue, Show.venue_id),
+)
+
+
+def recount(model, ids, now=None):
+    # recounts the venues or artists `ids` at once
+    if not ids:
+        return 0
+    counted = next(counted for counted in COUNTED if counted[0] is model)
+    return db.session.query(model).filter(model.id.in_(ids))\
+        .update(_show_counts(*counted, now=now or datetime.utcnow()), synchronize_session=False)
+
+
+def refresh_show_counters(now=None, full=False):
+    # returns the number of venues and artists recounted
+    now = now or datetime.utcnow()
+    recounted = 0
+    for model, foreign_key, other, other_key in COUNTED:
+        query = db.session.query(model)
+        if not full:
+            started = db.session.query(Show.id).filter(
+                foreign_key == model.id,
+                Show.start_time > model.show_counts_at,
+                Show.start_time <= now)
+            query = query.filter(started.exists())
+        recounted += query.update(_show_counts(model, foreign_key, other, other_key, now),
+                                  synchronize_session=False)
+    db.session.commit()
+    return recounted
+
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+# Only live venues and artists are read, and a show is listed only while
+# its venue and its artist both are (see Deletes below).
+
+
+def live(*models):
+    return db.and_(*[model.deleted_at.is_(None) for model in models])
+
+
+def has_genre(model, genre):
+    if db.engine.dialect.name != 'postgresql':
+        # a JSON list: EXISTS (SELECT 1 FROM json_each(genres) WHERE value = genre)
+        genres = db.func.json_each(model.genres).table_valued('value')
+        return db.exists().where(genres.c.value == genre)
+    # genres @> ARRAY[genre]; cast, as varchar[] @> text[] has no operator
+    return model.genres.op('@>')(db.cast([genre], db.ARRAY(db.String)))
+
+
+def venue_listing_query(genre=None, state=None):
+    query = db.session.query(Venue.city, Venue.state, Venue.id, Venue.name,
+                             Venue.upcoming_shows_count.label('num_upcoming_show')).filter(live(Venue))
+    if genre:
+        query = query.filter(has_genre(Venue, genre))
+    if state:
+        query = query.filter(Venue.state == state)
+    return query
+
+
+def artist_listing_query(genre=None):
+    query = db.session.query(Artist.id, Artist.name, Artist.city, Artist.state).filter(live(Artist))
+    if genre:
+        query = query.filter(has_genre(Artist, genre))
+    return query
+
+
+def show_listing_query(start=None, end=None, city=None):
+    # shows starting in [start, end), at venues in `city`
+    query = db.session.query(Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.end_time, Venue.name.label('venue_name'),
+                             Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'))\
+        .join(Artist, Artist.id == Show.artist_id).join(Venue, Venue.id == Show.venue_id)\
+        .filter(live(Venue, Artist))
+    if start:
+        query = query.filter(Show.start_time >= start)
+    if end:
+        query = query.filter(Show.start_time < end)
+    if city:
+        query = query.filter(Venue.city == city)
+    return query
+
+
+def _time_range(query, start, end):
+    return query.filter(Show.start_time >= start, Show.start_time < end)
+
+
+def venue_calendar_query(venue_id, start, end):
+    # a range of (venue_id, start_time), paged in (start_time, id) order
+    return _time_range(db.session.query(Show.id, Show.start_time, Show.end_time, Artist.id.label('artist_id'),
+                                        Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'))
+                       .join(Artist, Artist.id == Show.artist_id)
+                       .filter(Show.venue_id == venue_id, live(Artist)), start, end)
+
+
+def artist_calendar_query(artist_id, start, end):
+    return _time_range(db.session.query(Show.id, Show.start_time, Show.end_time, Venue.id.label('venue_id'),
+                                        Venue.name.label('venue_name'), Venue.image_link.label('venue_image_link'))
+                       .join(Venue, Venue.id == Show.venue_id)
+                       .filter(Show.artist_id == artist_id, live(Venue)), start, end)
+
+
+def venue_detail_query(venue_id):
+    # the venue and every show there in one ordered outer join; a show of a
+    # deleted artist comes back without its artist
+    return db.session.query(Venue, Show.id.label('show_id'), Show.start_time, Artist.id.label('artist_id'),
+                            Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'))\
+        .outerjoin(Show, Show.venue_id == Venue.id)\
+        .outerjoin(Artist, db.and_(Artist.id == Show.artist_id, live(Artist)))\
+        .filter(Venue.id == venue_id, live(Venue)).order_by(Show.start_time)
+
+
+def nearby_venue_query(venue_ids):
+    return db.session.query(Venue.id, Venue.name, Venue.address, Venue.city, Venue.state,
+                            Venue.image_link, Venue.latitude, Venue.longitude)\
+        .filter(Venue.id.in_(venue_ids), live(Venue))
+
+
+def nearby_shows_query(venue_ids, now, per_venue):
+    # the first `per_venue` upcoming shows of each venue, a range of
+    # (venue_id, start_time) per venue
+    rank = db.func.row_number().over(partition_by=Show.venue_id,
+                                     order_by=(Show.start_time, Show.id)).label('rank')
+    shows = db.session.query(Show.venue_id, Show.id, Show.start_time, Artist.id.label('artist_id'),
+                             Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'), rank)\
+        .join(Artist, Artist.id == Show.artist_id)\
+        .filter(Show.venue_id.in_(venue_ids), Show.start_time > now, live(Artist)).subquery()
+    return db.session.query(shows.c.venue_id, shows.c.id, shows.c.start_time, shows.c.artist_id,
+                            shows.c.artist_name, shows.c.artist_image_link)\
+        .filter(shows.c.rank <= per_venue).order_by(shows.c.venue_id, shows.c.rank)
+
+
+def artist_detail_query(artist_id):
+    # the artist and every show they play in one ordered outer join
+    return db.session.query(Artist, Show.id.label('show_id'), Show.start_time, Venue.id.label('venue_id'),
+                            Venue.name.label('venue_name'), Venue.image_link.label('venue_image_link'))\
+        .outerjoin(Show, Show.artist_id == Artist.id)\
+        .outerjoin(Venue, db.and_(Venue.id == Show.venue_id, live(Venue)))\
+        .filter(Artist.id == artist_id, live(Artist)).order_by(Show.start_time)
+
+
+def split_shows(shows, now):
+    # shows ordered by start_time -> (past, most recent first), (upcoming, soonest first)
+    past_shows = [show for show in shows if show['start_time'] <= now]
+    upcoming_shows = shows[len(past_shows):]
+    past_shows.reverse()
+    return past_shows, upcoming_shows
+
+
+def conflicting_show_query(venue_id, artist_id, start, end):
+    # shows overlapping [start, end) at the venue or by the artist; no show
+    # is longer than MAX_DURATION, so only those starting in
+    # (start - MAX_DURATION, end) can, a bounded range of each start_time index.
+    # The shows of a deleted venue or artist keep their slot until purged,
+    # as the exclusion constraints do
+    return db.session.query(Show).filter(
+        db.or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+        Show.start_time > start - MAX_DURATION,
+        Show.start_time < end,
+        Show.end_time > start).order_by(Show.start_time)
+
+
+def booked_intervals(field, id):
+    # the (start, end) bookings of a venue or artist, for a BookingIndex
+    return db.session.query(Show.start_time, Show.end_time)\
+        .filter(getattr(Show, field) == id).order_by(Show.start_time).all()
+
+
+#----------------------------------------------------------------------------#
+# Deletes.
+#----------------------------------------------------------------------------#
+
+# Deleting a venue or an artist only sets its deleted_at: one row updated,
+# and none of the index entries of its shows touched while the site is busy.
+# The other side's show counts are recounted at once. `flask purge-deleted`,
+# run off peak, then removes the deleted rows with set-based DELETEs, in
+# batches. The foreign keys of show cascade, so the database drops their
+# shows without the ORM loading them.
+
+
+def soft_delete(model, ids, now=None):
+    # -> (the live ids among `ids`, now deleted, the ids of the venues or
+    # artists on the other side of their shows, recounted)
+    now = now or datetime.utcnow()
+    ids = [row.id for row in db.session.query(model.id).filter(model.id.in_(ids), live(model))]
+    if not ids:
+        return [], []
+    db.session.query(model).filter(model.id.in_(ids))\
+        .update({model.deleted_at: now}, synchronize_session=False)
+    if model is Venue:
+        other, other_ids = Artist, show_artist_ids(*ids)
+    else:
+        other, other_ids = Venue, show_venue_ids(*ids)
+    recount(other, other_ids, now)
+    return ids, other_ids
+
+
+def purge_write_requests(before, batch_size=1000):
+    # -> the number of write_request rows created before `before` removed
+    purged = 0
+    while True:
+        keys = [row.key for row in db.session.query(WriteRequest.key)
+                .filter(WriteRequest.created_at < before).limit(batch_size)]
+        if not keys:
+            return purged
+        db.session.query(WriteRequest).filter(WriteRequest.key.in_(keys)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(keys)
+
+
+def purge_deleted(before, batch_size=1000):
+    # -> the number of venues and artists deleted before `before` removed
+    purged = 0
+    for model, foreign_key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        while True:
+            ids = [row.id for row in db.session.query(model.id)
+                   .filter(model.deleted_at < before).order_by(model.id).limit(batch_size)]
+            if not ids:
+                break
+            if db.engine.dialect.name != 'postgresql':
+                # SQLite enforces foreign keys only with PRAGMA foreign_keys
+                db.session.query(Show).filter(foreign_key.in_(ids)).delete(synchronize_session=False)
+            db.session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            purged += len(ids)
+    return purged
+
@@ -0,0 +1,130 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import abort, current_app, request, url_for
+from sqlalchemy import DateTime, tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#----------------------------------------------------------------------------#
+
+# Listings are paged by the last key seen rather than by OFFSET, so a deep
+# page costs the same index range scan as the first one. A cursor is the
+# url-safe base64 of the JSON list of key values of the boundary row.
+
+
+class Page(object):
+
+    def __init__(self, items, limit, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    # raises ValueError on anything that did not come from encode_cursor
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('expected %d values' % len(keys))
+        return [_cursor_value(key, v) for key, v in zip(keys, values)]
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('invalid cursor: %s' % e)
+
+
+def _cursor_value(key, value):
+    # a well-formed cursor can still hold a list where a time belongs, or a
+    # string where an id does
+    if isinstance(key.type, DateTime):
+        return datetime.fromisoformat(value)
+    expected = key.type.python_type
+    if type(value) is not expected:
+        raise ValueError('expected %s for %s' % (expected.__name__, key.key))
+    return value
+
+
+def page_size(requested, default, maximum):
+    try:
+        size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _row_cursor(row, keys):
+    return encode_cursor([getattr(row, key.key) for key in keys])
+
+
+def _compare(keys, values, op):
+    if len(keys) == 1:
+        return op(keys[0], values[0])
+    return op(tuple_(*keys), tuple_(*values))
+
+
+def keyset_page(query, keys, limit, after=None, before=None):
+    # `keys` must be unique together (end with the primary key) and be
+    # selected by `query` under their own names. `after` / `before` are
+    # cursors as produced by a previous Page.
+    if before:
+        values = decode_cursor(before, keys)
+        query = query.filter(_compare(keys, values, lambda a, b: a < b))\
+            .order_by(*[key.desc() for key in keys])
+    else:
+        if after:
+            values = decode_cursor(after, keys)
+            query = query.filter(_compare(keys, values, lambda a, b: a > b))
+        query = query.order_by(*keys)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or before:
+            next_cursor = _row_cursor(rows[-1], keys)
+        if (has_more and before) or after:
+            prev_cursor = _row_cursor(rows[0], keys)
+    return Page(rows, limit, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def listing_page(query, keys):
+    # the page of `query` asked for by ?limit=&after=&before=
+    limit = page_size(request.args.get('limit'),
+                      current_app.config['PAGE_SIZE'], current_app.config['MAX_PAGE_SIZE'])
+    try:
+        return keyset_page(query, keys, limit,
+                           after=request.args.get('after'),
+                           before=request.args.get('before'))
+    except ValueError:
+        abort(400)
+
+
+def page_url(after=None, before=None):
+    # link to the current endpoint with the same filters and another cursor
+    args = request.args.to_dict()
+    args.pop('after', None)
+    args.pop('before', None)
+    if after:
+        args['after'] = after
+    if before:
+        args['before'] = before
+    args.update(request.view_args or {})
+    return url_for(request.endpoint, **args)
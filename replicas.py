@@ -0,0 +1,141 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+#----------------------------------------------------------------------------#
+# Read replicas.
+#----------------------------------------------------------------------------#
+
+# Views decorated with @replicas.reads (the listings, detail pages, calendars,
+# searches and exports) run their queries on one of SQLALCHEMY_REPLICA_URIS,
+# taken round robin; everything else, and any flush, stays on the primary.
+#
+# A replica is probed with SELECT 1 when its last check is older than
+# REPLICA_CHECK_INTERVAL and skipped for REPLICA_RETRY_AFTER seconds when the
+# probe or a query of a view fails to connect. With no healthy replica the
+# reads go to the primary.
+#
+# Replicas lag behind the primary, so a browser that has just written (a
+# create, edit or delete, usually followed by a redirect to the page showing
+# it) gets a cookie that keeps its reads on the primary for
+# REPLICA_STICKY_SECONDS.
+
+STICKY_COOKIE = 'fyyur_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class Replica(object):
+
+    def __init__(self, url, engine_options, retry_after):
+        self.url = make_url(url)
+        self.engine = create_engine(self.url, **engine_options)
+        self.retry_after = retry_after
+        self.checked_at = 0.0
+        self.down_until = 0.0
+        event.listen(self.engine, 'handle_error', self.on_error)
+
+    def on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down()
+
+    def mark_down(self):
+        self.down_until = time.monotonic() + self.retry_after
+
+    def healthy(self, check_interval):
+        now = time.monotonic()
+        if now < self.down_until:
+            return False
+        if now - self.checked_at >= check_interval:
+            self.checked_at = now
+            try:
+                with self.engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+            except Exception:
+                current_app.logger.warning('read replica %s is down', self.url.render_as_string())
+                self.mark_down()
+                return False
+        return True
+
+
+class Replicas(object):
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        app.extensions['replicas'] = {
+            'replicas': [Replica(url, options, app.config['REPLICA_RETRY_AFTER'])
+                         for url in app.config.get('SQLALCHEMY_REPLICA_URIS', ())],
+            'turns': itertools.count(),
+            'lock': threading.Lock(),
+        }
+        app.after_request(self.stick_to_primary)
+
+    def choose(self):
+        # -> the index of the replica to read from, or None for the primary
+        state = current_app.extensions['replicas']
+        replicas = state['replicas']
+        if not replicas or self.sticky():
+            return None
+        check_interval = current_app.config['REPLICA_CHECK_INTERVAL']
+        for _ in range(len(replicas)):
+            with state['lock']:
+                index = next(state['turns']) % len(replicas)
+            if replicas[index].healthy(check_interval):
+                return index
+        return None
+
+    def sticky(self):
+        return sticky()
+
+    def reads(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.replica = self.choose()
+            g.replica_routed = True
+            return view(*args, **kwargs)
+        return wrapper
+
+    def stick_to_primary(self, response):
+        seconds = current_app.config['REPLICA_STICKY_SECONDS']
+        if request.method not in SAFE_METHODS and not g.get('replica_routed') \
+                and response.status_code < 400 and current_app.extensions['replicas']['replicas']:
+            response.set_cookie(STICKY_COOKIE, '%.3f' % (time.time() + seconds),
+                                max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+
+def sticky():
+    # whether this browser has written within REPLICA_STICKY_SECONDS
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def current_replica():
+    # the replica the running view reads from, or None for the primary
+    index = g.get('replica') if has_request_context() else None
+    if index is None:
+        return None
+    return current_app.extensions['replicas']['replicas'][index]
+
+
+class RoutingSession(Session):
+    # Flask-SQLAlchemy's session, sending the reads of @replicas.reads views
+    # to their replica
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replica = current_replica()
+            if replica is not None:
+                return replica.engine
+        return super(RoutingSession, self).get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
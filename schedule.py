@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from flask import abort, render_template, request, url_for
+
+import api
+from dates import format_datetime, group_by_day, month_range
+from models import Show
+from pagination import listing_page
+
+#----------------------------------------------------------------------------#
+# Calendars.
+#----------------------------------------------------------------------------#
+
+# A venue's or an artist's calendar is one month of its shows: a range scan
+# of its (venue_id, start_time) / (artist_id, start_time) index, paged like
+# the listings so a busy month is never rendered at once.
+
+
+def month_page(shows_query):
+    # the page of shows_query(start, end) for ?month=YYYY-MM (default: now)
+    try:
+        start, end = month_range(request.args.get('month'))
+    except ValueError:
+        abort(400)
+    query = shows_query(start, end)
+    return start, end, query, listing_page(query, [Show.start_time, Show.id])
+
+
+def month_url(month):
+    args = dict(request.view_args or {}, month=month.strftime('%Y-%m'))
+    return url_for(request.endpoint, **args)
+
+
+def render_calendar(name, link, playing, shows_query):
+    # `playing`: 'artist' on a venue's calendar, 'venue' on an artist's
+    start, end, _, page = month_page(shows_query)
+    rows = [dict(row._mapping) for row in page]
+    # January of year 1 has no month before it
+    prev_month = month_url(start - timedelta(days=1)) if start > datetime.min else None
+    return render_template('pages/calendar.html', name=name, link=link, playing=playing,
+                           month=format_datetime(start, 'month'), days=group_by_day(rows),
+                           prev_month=prev_month, next_month=month_url(end), page=page)
+
+
+def calendar_json(shows_query):
+    _, _, query, page = month_page(shows_query)
+    return api.json_response(api.listing(page.items, api.query_fields(query), page))
@@ -0,0 +1,115 @@
+import re
+from collections import namedtuple
+
+from sqlalchemy import String, literal_column, or_
+
+from indexes import InProcessIndex
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+# Venues and artists are searched on "name city, state". On PostgreSQL the
+# query runs against a pg_trgm GIN index over that expression (see the
+# search index migration); on any other database an in-process trigram index
+# with the same ranking is kept per model and rebuilt after writes (see
+# indexes.py). Deleted
+# venues and artists (deleted_at set) are never found.
+
+WORD_SIMILARITY_THRESHOLD = 0.3
+
+SearchResult = namedtuple('SearchResult', ['id', 'name'])
+
+
+def search_text(model):
+    # must stay identical to the indexed expression in the migration
+    return model.name + literal_column("' '", String) + model.city \
+        + literal_column("', '", String) + model.state
+
+
+def like_pattern(term):
+    return '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+
+def trigrams(text):
+    # same tokenisation as pg_trgm: lower-cased alphanumeric words padded
+    # with two spaces in front and one behind
+    grams = set()
+    for word in re.findall(r'\w+', text.lower()):
+        word = '  ' + word + ' '
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class TrigramIndex(object):
+
+    def __init__(self):
+        self.documents = {}
+        self.postings = {}
+
+    def add(self, doc_id, text, name):
+        grams = trigrams(text)
+        self.documents[doc_id] = (text.lower(), name, grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(doc_id)
+
+    def search(self, term, limit):
+        term = term.strip()
+        if not term:
+            ranked = sorted(self.documents.items(), key=lambda d: (d[1][1], d[0]))
+            return [SearchResult(doc_id, doc[1]) for doc_id, doc in ranked[:limit]]
+
+        needle = term.lower()
+        query = trigrams(term)
+        candidates = set()
+        for gram in query:
+            candidates.update(self.postings.get(gram, ()))
+        # a substring can be shorter than one trigram ("NY"), so scan for it
+        # only when the trigrams could not have found every match
+        if not query or len(needle) < 3:
+            candidates.update(doc_id for doc_id, doc in self.documents.items()
+                              if needle in doc[0])
+
+        ranked = []
+        for doc_id in candidates:
+            text, name, grams = self.documents[doc_id]
+            score = len(query & grams) / float(len(query)) if query else 0.0
+            if needle in text or score >= WORD_SIMILARITY_THRESHOLD:
+                ranked.append((-score, name, doc_id))
+        ranked.sort()
+        return [SearchResult(doc_id, name) for _, name, doc_id in ranked[:limit]]
+
+
+class Search(InProcessIndex):
+
+    def __init__(self, db, model, generations=None):
+        super(Search, self).__init__(db, model, 'search:' + model.__tablename__, generations)
+
+    def search(self, term, limit):
+        if self.db.engine.dialect.name == 'postgresql':
+            return self._search_postgres(term, limit)
+        return self._search_in_process(term, limit)
+
+    def _search_postgres(self, term, limit):
+        model = self.model
+        text = search_text(model)
+        query = self.db.session.query(model.id, model.name).filter(model.deleted_at.is_(None))
+        term = term.strip()
+        if not term:
+            return query.order_by(model.name, model.id).limit(limit).all()
+        return query.filter(or_(text.ilike(like_pattern(term), escape='\\'),
+                                text.op('%>')(term)))\
+            .order_by(self.db.func.word_similarity(term, text).desc(), model.name, model.id)\
+            .limit(limit).all()
+
+    def _search_in_process(self, term, limit):
+        return self.index().search(term, limit)
+
+    def _build(self):
+        model = self.model
+        index = TrigramIndex()
+        rows = self.db.session.query(model.id, model.name, model.city, model.state)\
+            .filter(model.deleted_at.is_(None))
+        for row in rows:
+            index.add(row.id, '%s %s, %s' % (row.name, row.city, row.state), row.name)
+        return index
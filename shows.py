@@ -0,0 +1,146 @@
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+
+import api
+from bookings import DEFAULT_DURATION, booking_error
+from dates import format_datetime, label_datetimes, parse_datetime, parse_range
+from exporter import export_response
+from extensions import cache, db, replicas, writes
+from forms import ShowForm
+from models import Artist, Show, Venue, conflicting_show_query, count_show, live, show_listing_query
+from pagination import listing_page
+from writes import flash_result
+
+bp = Blueprint('shows', __name__)
+
+# the exclusion constraints a booking violates when it overlaps one
+# committed after conflicting_show_query looked
+OVERLAP_CONSTRAINTS = ('show_venue_no_overlap', 'show_artist_no_overlap')
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@cache.cached('shows')
+@replicas.reads
+def shows():
+    # displays list of shows at /shows
+    # DONE: replace with real venues data.
+    #       num_shows should be aggregated based on number of upcoming shows per venue.
+    data = []
+    page = listing_page(filtered_show_query(), [Show.start_time, Show.id])
+
+    for show in page:
+        data.append({
+            'id': show.id,
+            'venue_id': show.venue_id,
+            'venue_name': show.venue_name,
+            'artist_id': show.artist_id,
+            'artist_name': show.artist_name,
+            'artist_image_link': show.artist_image_link,
+            'start_time': show.start_time
+        })
+    return render_template('pages/shows.html', shows=label_datetimes(data), page=page)
+
+
+def filtered_show_query():
+    # ?from=&to=&city=: a range of the (start_time, id) index instead of
+    # every show ever booked
+    try:
+        start, end = parse_range(request.args.get('from'), request.args.get('to'))
+    except (ValueError, OverflowError):
+        abort(400)
+    return show_listing_query(start, end, request.args.get('city'))
+
+
+
+@bp.route('/shows/export')
+@replicas.reads
+def export_shows():
+    columns = ['id', 'venue_id', 'venue_name', 'artist_id', 'artist_name', 'start_time', 'end_time']
+    query = db.session.query(Show.id, Show.venue_id, Venue.name, Show.artist_id, Artist.name,
+                             Show.start_time, Show.end_time)\
+        .join(Venue, Venue.id == Show.venue_id).join(Artist, Artist.id == Show.artist_id)\
+        .filter(live(Venue, Artist)).order_by(Show.id)
+    return export_response('shows', columns, query)
+
+
+@bp.route('/shows/create')
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db, upon submitting new show listing form
+    # DONE: insert form data as a new Show record in the db, instead
+    try:
+        artist_id = int(request.form['artist_id'])
+        venue_id = int(request.form['venue_id'])
+        start_time = parse_datetime(request.form['start_time'])
+        end_time = request.form.get('end_time')
+        end_time = parse_datetime(end_time) if end_time else start_time + DEFAULT_DURATION
+    except (KeyError, ValueError, OverflowError):
+        flash('Please give numeric artist and venue IDs and times as YYYY-MM-DD HH:MM')
+        return redirect(url_for('.create_shows'))
+    if db.session.query(Venue.id).filter(Venue.id == venue_id, live(Venue)).first() is None \
+            or db.session.query(Artist.id).filter(Artist.id == artist_id, live(Artist)).first() is None:
+        flash('There is no venue or artist with that ID')
+        return redirect(url_for('.create_shows'))
+    problem = booking_error(start_time, end_time)
+    if problem:
+        flash('The end time ' + problem)
+        return redirect(url_for('.create_shows'))
+    conflict = conflicting_show_query(venue_id, artist_id, start_time, end_time).first()
+    if conflict is not None:
+        booked = 'The venue' if conflict.venue_id == venue_id else 'The artist'
+        flash('%s is already booked from %s to %s' % (
+            booked, format_datetime(conflict.start_time), format_datetime(conflict.end_time)))
+        return redirect(url_for('.create_shows'))
+
+    values = dict(venue_id=venue_id, artist_id=artist_id, start_time=start_time, end_time=end_time)
+    result = writes.submit('create_show', values)
+    if result.status == 'failed' and any(name in (result.error or '') for name in OVERLAP_CONSTRAINTS):
+        flash('The venue or the artist was booked for that time in the meantime')
+    else:
+        flash_result(result,
+                     done='Show was successfully created! 🚀',
+                     failed='Oh no something went wrong',
+                     queued='Show will be listed in a moment 🚀')
+    return redirect(url_for('index'))
+
+
+@writes.operation('create_show')
+def apply_create_show(values):
+    # checked again in the write's own transaction: a queued booking may
+    # have been overtaken by another in the same write-behind batch, which
+    # SQLite has no exclusion constraint to catch
+    conflict = conflicting_show_query(values['venue_id'], values['artist_id'],
+                                      values['start_time'], values['end_time']).first()
+    if conflict is not None:
+        constraint = OVERLAP_CONSTRAINTS[0 if conflict.venue_id == values['venue_id'] else 1]
+        raise ValueError('%s: show %d is booked from %s to %s' % (
+            constraint, conflict.id, conflict.start_time, conflict.end_time))
+    show = Show(**values)
+    db.session.add(show)
+    count_show(show.venue_id, show.artist_id, show.start_time)
+
+    def invalidate():
+        cache.invalidate('shows')
+        cache.invalidate('venues')
+        cache.invalidate('venue', values['venue_id'])
+        cache.invalidate('artist', values['artist_id'])
+    return show, invalidate
+
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/shows')
+@replicas.reads
+def api_shows():
+    query = filtered_show_query()
+    page = listing_page(query, [Show.start_time, Show.id])
+    return api.json_response(api.listing(page.items, api.query_fields(query), page))
@@ -0,0 +1,69 @@
+import threading
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+from cache import MemoryCache
+
+#----------------------------------------------------------------------------#
+# Templates.
+#----------------------------------------------------------------------------#
+
+# Compiled templates go to a bytecode cache on disk (TEMPLATE_BYTECODE_DIR,
+# by default a per-user directory under /tmp) that every worker on the host
+# reads. gunicorn's master compiles them all there before forking, so no
+# worker compiles a template itself. Jinja keys the cache on the template
+# source, so an edited template is recompiled rather than served stale.
+#
+# The show tiles on the listing, venue and artist pages are rendered once
+# and kept in an in-process LRU of FRAGMENT_CACHE_SIZE tiles. The views
+# format the start times of a page at once (dates.label_datetimes), and a
+# tile is keyed on the show id and every value it is rendered from (names,
+# image, start time and its label), so an edited show, artist or venue
+# simply misses: there is nothing to invalidate, and a page render after a
+# write only renders the tiles that changed.
+
+
+class Templates(object):
+
+    def __init__(self, app=None):
+        self.tiles = None
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config.get('TEMPLATE_BYTECODE_DIR'))
+        size = app.config.get('FRAGMENT_CACHE_SIZE', 10000)
+        self.tiles = MemoryCache(size, ttl=0) if size else None
+        app.jinja_env.globals['show_tile'] = self.show_tile
+
+    def compile_all(self, app):
+        # -> the number of templates now in the bytecode cache
+        count = 0
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            app.jinja_env.get_template(name)
+            count += 1
+        return count
+
+    def show_tile(self, template, show):
+        # `show`: a dict with an 'id'; its values are the key
+        render = lambda: Markup(current_app.jinja_env.get_template(template).render(show=show))
+        if self.tiles is None:
+            return render()
+        key = (template,) + tuple(sorted(show.items()))
+        tile = self.tiles.get(key)
+        if tile is None:
+            self._count('misses')
+            tile = render()
+            self.tiles.set(key, tile)
+        else:
+            self._count('hits')
+        return tile
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
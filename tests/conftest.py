@@ -0,0 +1,79 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+# config.py reads the environment when imported: an in-memory SQLite
+# database, the memory cache and no slow query log
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['CACHE_BACKEND'] = 'memory'
+os.environ['SLOW_QUERY_LOG'] = ''
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+os.environ.pop('WRITE_BEHIND', None)
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import cache, db  # noqa: E402
+from models import Artist, Show, Venue, refresh_show_counters  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    # the app logs to error.log in the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        app = create_app(migrations=False)
+    finally:
+        os.chdir(cwd)
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+@pytest.fixture
+def catalog(app):
+    # a fresh database: venues in two cities, artists, and shows a day
+    # apart from five days ago on
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        cache.backend.clear()
+        now = datetime.utcnow()
+        venues = [Venue(name='Venue %d' % i, city=('San Francisco', 'New York')[i % 2],
+                        state=('CA', 'NY')[i % 2], address='%d Main St' % i, phone='555-0100',
+                        genres=['Jazz', 'Rock'] if i % 3 == 0 else ['Folk'])
+                  for i in range(6)]
+        artists = [Artist(name='Artist %d' % i, city='San Francisco', state='CA', phone='555-0100',
+                          genres=['Rock'])
+                   for i in range(4)]
+        db.session.add_all(venues + artists)
+        db.session.flush()
+        shows = [Show(venue_id=venues[i % 6].id, artist_id=artists[i % 4].id,
+                      start_time=now + timedelta(days=i - 5))
+                 for i in range(12)]
+        db.session.add_all(shows)
+        db.session.commit()
+        refresh_show_counters(full=True)
+        yield {'venues': [venue.id for venue in venues], 'artists': [artist.id for artist in artists],
+               'shows': [show.id for show in shows], 'now': now}
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, catalog):
+    return app.test_client()
+
+
+@contextmanager
+def statements():
+    # the SQL statements run inside the block
+    found = []
+    listener = lambda *args: found.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        yield found
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
@@ -0,0 +1,92 @@
+import io
+from datetime import datetime, timedelta
+
+from bookings import Booked, BookingIndex, booking_error
+from extensions import db
+from importer import ShowImporter, read_rows
+from models import Artist, Show, Venue, booked_intervals
+
+
+def form_time(value):
+    return value.strftime('%Y-%m-%d %H:%M')
+
+
+def import_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def book(client, venue_id, artist_id, start, end=None):
+    data = {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': form_time(start)}
+    if end is not None:
+        data['end_time'] = form_time(end)
+    return client.post('/shows/create', data=data, follow_redirects=True)
+
+
+def test_booked_intervals_touching_do_not_overlap():
+    day = datetime(2026, 11, 6)
+    booked = Booked([(day.replace(hour=18), day.replace(hour=20)), (day.replace(hour=21), day.replace(hour=23))])
+    assert booked.overlapping(day.replace(hour=20), day.replace(hour=21)) is None
+    assert booked.overlapping(day.replace(hour=17), day.replace(hour=18)) is None
+    assert booked.overlapping(day.replace(hour=19), day.replace(hour=22)) == \
+        (day.replace(hour=21), day.replace(hour=23))
+    assert booked.overlapping(day.replace(hour=22, minute=59), day.replace(hour=23, minute=30)) is not None
+
+
+def test_booking_error():
+    start = datetime(2026, 11, 6, 20)
+    assert booking_error(start, start) == 'must be after the start time'
+    assert booking_error(start, start + timedelta(hours=25)) == 'a show can last at most 24 hours'
+    assert booking_error(start, start + timedelta(hours=3)) is None
+
+
+def test_a_free_slot_is_booked(app, client, catalog):
+    start = catalog['now'] + timedelta(days=20)
+    response = book(client, catalog['venues'][0], catalog['artists'][0], start)
+    assert b'Show was successfully created!' in response.data
+    with app.app_context():
+        show = db.session.query(Show).order_by(Show.id.desc()).first()
+        assert show.id == len(catalog['shows']) + 1
+        assert (show.venue_id, show.artist_id, show.start_time) == \
+            (catalog['venues'][0], catalog['artists'][0], start.replace(second=0, microsecond=0))
+
+
+def test_a_venue_cannot_be_double_booked(app, client, catalog):
+    # venue 5 and artist 1 play show 6, from now for two hours
+    response = book(client, catalog['venues'][5], catalog['artists'][3], catalog['now'] + timedelta(hours=1))
+    assert b'The venue is already booked from' in response.data
+    with app.app_context():
+        assert db.session.query(Show).count() == len(catalog['shows'])
+
+
+def test_an_artist_cannot_be_double_booked(app, client, catalog):
+    response = book(client, catalog['venues'][0], catalog['artists'][1], catalog['now'] + timedelta(hours=1))
+    assert b'The artist is already booked from' in response.data
+    with app.app_context():
+        assert db.session.query(Show).count() == len(catalog['shows'])
+
+
+def test_a_show_must_end_after_it_starts(client, catalog):
+    start = catalog['now'] + timedelta(days=20)
+    response = book(client, catalog['venues'][0], catalog['artists'][0], start, end=start - timedelta(hours=1))
+    assert b'The end time must be after the start time' in response.data
+
+
+def test_imports_reject_double_bookings(app, catalog):
+    now = catalog['now']
+    later = now + timedelta(days=20)
+    rows = io.StringIO(
+        'venue_id,artist_id,start_time\n'
+        # venue 5 is booked from now
+        '%d,%d,%s\n' % (catalog['venues'][5], catalog['artists'][3], import_time(now + timedelta(hours=1)))
+        + '%d,%d,%s\n' % (catalog['venues'][0], catalog['artists'][0], import_time(later))
+        # the row above booked artist 0
+        + '%d,%d,%s\n' % (catalog['venues'][1], catalog['artists'][0], import_time(later + timedelta(hours=1))))
+    with app.app_context():
+        importer = ShowImporter(db, Show, Artist, Venue, bookings=BookingIndex(booked_intervals))
+        report = importer.run(read_rows(rows, 'csv'))
+        assert [(rejected['line'], list(rejected['errors'])) for rejected in report.rejected] == \
+            [(2, ['venue_id']), (4, ['artist_id'])]
+        # line 3 is inserted
+        assert db.session.query(Show).count() == len(catalog['shows']) + 1
+        assert db.session.query(Show).filter(Show.venue_id == catalog['venues'][0],
+                                             Show.start_time == later.replace(microsecond=0)).count() == 1
@@ -0,0 +1,85 @@
+from cache import MemoryCache, RedisCache, LocalRedis
+from extensions import db
+from models import Venue, venue_search
+
+VENUE_FORM = {
+    'city': 'San Francisco', 'state': 'CA', 'address': '1 Market St', 'phone': '555-0199',
+    'genres': 'Jazz', 'facebook_link': '', 'website': '', 'image_link': '',
+}
+
+
+def test_pages_are_cached(app, client):
+    assert client.get('/venues').headers['X-Cache'] == 'MISS'
+    assert client.get('/venues').headers['X-Cache'] == 'HIT'
+    assert client.get('/venues?state=CA').headers['X-Cache'] == 'MISS'
+
+
+def test_creating_a_venue_invalidates_the_listing(app, client):
+    client.get('/venues')
+    assert client.get('/venues').headers['X-Cache'] == 'HIT'
+
+    writer = app.test_client()
+    assert writer.post('/venues/create', data=dict(VENUE_FORM, name='The New Room')).status_code == 302
+
+    response = client.get('/venues')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert b'The New Room' in response.data
+
+
+def test_editing_a_venue_invalidates_its_page_and_its_artists(app, client, catalog):
+    venue_id, artist_id = catalog['venues'][0], catalog['artists'][0]
+    for path in ('/venues/%d' % venue_id, '/artists/%d' % artist_id, '/venues/%d' % catalog['venues'][1]):
+        client.get(path)
+        assert client.get(path).headers['X-Cache'] == 'HIT'
+
+    writer = app.test_client()
+    writer.post('/venues/%d/edit' % venue_id, data=dict(VENUE_FORM, name='Renamed Hall'))
+
+    venue = client.get('/venues/%d' % venue_id)
+    assert venue.headers['X-Cache'] == 'MISS'
+    assert b'Renamed Hall' in venue.data
+    # artist 0 plays venue 0 (see the catalog fixture)
+    artist = client.get('/artists/%d' % artist_id)
+    assert artist.headers['X-Cache'] == 'MISS'
+    assert b'Renamed Hall' in artist.data
+    assert client.get('/venues/%d' % catalog['venues'][1]).headers['X-Cache'] == 'HIT'
+
+
+def test_search_index_is_dropped_on_commit_only(app, catalog):
+    with app.app_context():
+        index = venue_search.index()
+        db.session.add(Venue(name='Rolled Back Room', city='Oakland', state='CA', address='1 Broadway'))
+        db.session.flush()
+        assert venue_search.index() is index
+        db.session.rollback()
+        assert venue_search.index() is index
+
+        db.session.add(Venue(name='Committed Room', city='Oakland', state='CA', address='1 Broadway'))
+        db.session.commit()
+        assert venue_search.index() is not index
+
+
+def test_a_pending_flash_bypasses_the_cache(app, client):
+    client.get('/venues')
+    client.post('/venues/create', data=dict(VENUE_FORM, name='Flashed'))
+    response = client.get('/venues')
+    assert 'X-Cache' not in response.headers
+    assert b'Venue Flashed was successfully created!' in response.data
+
+
+def test_generations_outlive_evicted_pages():
+    backend = MemoryCache(max_entries=2)
+    backend.incr('gen:venue:1')
+    for i in range(10):
+        backend.set('page:%d' % i, (b'', 'text/html'))
+    assert backend.info()['entries'] == 2
+    assert backend.counter('gen:venue:1') == 1
+
+
+def test_redis_generations_do_not_expire():
+    backend = RedisCache(LocalRedis(), ttl=1)
+    assert backend.counter('gen:venue:1') == 0
+    backend.incr('gen:venue:1')
+    backend.incr('gen:venue:1')
+    assert backend.counter('gen:venue:1') == 2
+    assert backend.client._values['fyyur:gen:venue:1'][1] is None
@@ -0,0 +1,29 @@
+import pytest
+
+from dates import month_range
+
+
+def test_month_range():
+    start, end = month_range('2026-12')
+    assert (start.year, start.month, end.year, end.month) == (2026, 12, 2027, 1)
+    with pytest.raises(ValueError):
+        month_range('9999-12')
+
+
+@pytest.mark.parametrize('path', ['/venues/%d/calendar', '/api/v1/venues/%d/calendar'])
+def test_month_out_of_range_is_a_bad_request(client, catalog, path):
+    path = path % catalog['venues'][0]
+    for month in ('9999-12', '2026-13', 'November'):
+        assert client.get('%s?month=%s' % (path, month)).status_code == 400
+    assert client.get('%s?month=9999-11' % path).status_code == 200
+    assert client.get('%s?month=0001-01' % path).status_code == 200
+
+
+@pytest.mark.parametrize('kind', ['venues', 'artists'])
+def test_calendar_of_a_missing_or_deleted_id_is_not_found(client, catalog, kind):
+    for path in ('/%s/%%d/calendar', '/api/v1/%s/%%d/calendar'):
+        assert client.get(path % kind % 9999).status_code == 404
+    deleted = catalog[kind][1]
+    assert client.delete('/%s/%d' % (kind, deleted)).status_code == 302
+    for path in ('/%s/%%d/calendar', '/api/v1/%s/%%d/calendar'):
+        assert client.get(path % kind % deleted).status_code == 404
@@ -0,0 +1,62 @@
+from extensions import db
+from models import Artist, Show, Venue
+
+
+def test_a_deleted_venue_disappears_from_every_page(app, client, catalog):
+    venue_id, artist_id = catalog['venues'][0], catalog['artists'][2]
+    name = b'Venue 0'
+    # cached before the delete
+    for path in ('/venues', '/shows', '/venues/%d' % venue_id, '/artists/%d' % artist_id):
+        assert name in client.get(path).data
+    with app.app_context():
+        upcoming = db.session.get(Artist, artist_id).upcoming_shows_count
+
+    assert client.delete('/venues/%d' % venue_id).status_code == 302
+
+    reader = app.test_client()
+    assert reader.get('/venues/%d' % venue_id).status_code == 404
+    assert reader.get('/api/v1/venues/%d' % venue_id).status_code == 404
+    for path in ('/venues', '/shows', '/artists/%d' % artist_id):
+        assert name not in reader.get(path).data, path
+    assert name not in reader.post('/venues/search', data={'search_term': 'Venue'}).data
+    with app.app_context():
+        venue = db.session.get(Venue, venue_id)
+        assert venue.deleted_at is not None
+        # its shows stay until purged, but no longer count for the artist
+        assert db.session.query(Show).filter(Show.venue_id == venue_id).count() == 2
+        assert db.session.get(Artist, artist_id).upcoming_shows_count == upcoming - 1
+    assert client.delete('/venues/%d' % venue_id).status_code == 404
+
+
+def test_bulk_delete(client, catalog):
+    venues = catalog['venues']
+    response = client.post('/api/v1/venues/delete', json={'ids': [venues[1], venues[2], 9999]})
+    assert response.get_json() == {'deleted': [venues[1], venues[2]]}
+    # already deleted
+    response = client.post('/api/v1/venues/delete', json={'ids': [venues[1]]})
+    assert response.get_json() == {'deleted': []}
+
+    artists = catalog['artists']
+    response = client.post('/api/v1/artists/delete', json={'ids': [artists[3]]})
+    assert response.get_json() == {'deleted': [artists[3]]}
+    assert client.get('/artists/%d' % artists[3]).status_code == 404
+
+
+def test_bulk_delete_takes_a_list_of_ids(app, client):
+    assert client.post('/api/v1/venues/delete', json={'ids': '1'}).status_code == 400
+    assert client.post('/api/v1/venues/delete', json={'ids': [1, 'two']}).status_code == 400
+    assert client.post('/api/v1/venues/delete', data='ids=1').status_code == 400
+    limit = app.config['MAX_BULK_DELETE']
+    assert client.post('/api/v1/venues/delete', json={'ids': list(range(limit + 1))}).status_code == 400
+
+
+def test_purge_removes_deleted_rows_and_their_shows(app, client, catalog):
+    venue_id = catalog['venues'][0]
+    client.delete('/venues/%d' % venue_id)
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=['purge-deleted'])
+        assert result.output == '1 venues and artists purged\n'
+        assert db.session.get(Venue, venue_id) is None
+        assert db.session.query(Show).filter(Show.venue_id == venue_id).count() == 0
+        assert db.session.query(Show).count() == len(catalog['shows']) - 2
+        assert db.session.query(Venue).count() == len(catalog['venues']) - 1
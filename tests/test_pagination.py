@@ -0,0 +1,60 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from models import Show
+from pagination import decode_cursor, encode_cursor
+
+
+def pages(client, path, cursor_arg, cursor_key, cursor=None):
+    # the ids on each page, following the cursors to the end
+    found = []
+    while True:
+        url = path + ('&%s=%s' % (cursor_arg, cursor) if cursor else '')
+        payload = client.get(url).get_json()
+        found.append([row[0] for row in payload['data']])
+        cursor = payload[cursor_key]
+        if cursor is None:
+            return found
+
+
+def test_cursor_round_trip():
+    start = datetime(2026, 11, 6, 20, 30)
+    cursor = encode_cursor([start, 7])
+    assert decode_cursor(cursor, [Show.start_time, Show.id]) == [start, 7]
+
+
+@pytest.mark.parametrize('values', [
+    '!!!',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+    encode_cursor([1]),
+    encode_cursor({'start_time': 1}),
+    encode_cursor([1, 2]),
+    encode_cursor(['Friday', 2]),
+    encode_cursor(['2024-01-01T20:00:00', '2']),
+    encode_cursor(['2024-01-01T20:00:00', True]),
+])
+def test_invalid_cursors_are_value_errors(values):
+    with pytest.raises(ValueError):
+        decode_cursor(values, [Show.start_time, Show.id])
+
+
+def test_shows_pages_forward_and_back(client, catalog):
+    forward = pages(client, '/api/v1/shows?limit=5', 'after', 'next')
+    assert forward == [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10], [11, 12]]
+
+    # after show 6, which starts now
+    last = client.get('/api/v1/shows?limit=5&after=%s' % encode_cursor([catalog['now'], 6])).get_json()
+    assert [row[0] for row in last['data']] == [7, 8, 9, 10, 11]
+
+    back = client.get('/api/v1/shows?limit=5&before=%s' % last['prev']).get_json()
+    assert [row[0] for row in back['data']] == [2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize('path', ['/shows', '/api/v1/shows', '/venues', '/api/v1/venues'])
+def test_malformed_cursor_is_a_bad_request(client, path):
+    for cursor in ('!!!', encode_cursor([1, 2]), encode_cursor([[1], [2], [3]]),
+                   encode_cursor(['2024-01-01T20:00:00', '2']), encode_cursor([1, 'CA', 2])):
+        assert client.get('%s?after=%s' % (path, cursor)).status_code == 400
+        assert client.get('%s?before=%s' % (path, cursor)).status_code == 400
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from conftest import statements
+from extensions import cache, db
+from models import Show, Venue
+
+
+def add_venues(count):
+    start = datetime.utcnow() + timedelta(days=30)
+    venues = [Venue(name='More %d' % i, city='Austin', state='TX', address='1 Side St', phone='555-0101')
+              for i in range(count)]
+    db.session.add_all(venues)
+    db.session.flush()
+    db.session.add_all([Show(venue_id=venue.id, artist_id=1, start_time=start) for venue in venues])
+    db.session.commit()
+    cache.invalidate('venues')
+
+
+def test_venues_listing_is_one_statement(app, client):
+    with app.app_context():
+        with statements() as found:
+            response = client.get('/venues')
+        assert response.status_code == 200
+        assert len(found) == 1, found
+
+        # the same with five times the venues: no statement per venue or area
+        add_venues(24)
+        with statements() as found:
+            response = client.get('/venues')
+        assert response.status_code == 200
+        assert b'More 23' in response.data
+        assert len(found) == 1, found
+
+
+def test_venues_listing_groups_by_area(client):
+    body = client.get('/venues').get_data(as_text=True)
+    assert body.index('New York') < body.index('San Francisco')
+    for i in range(6):
+        assert 'Venue %d' % i in body
+
+
+def test_venue_page_is_one_statement(app, client, catalog):
+    with app.app_context():
+        with statements() as found:
+            response = client.get('/venues/%d' % catalog['venues'][0])
+        assert response.status_code == 200
+        assert len(found) == 1, found
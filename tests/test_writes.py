@@ -0,0 +1,128 @@
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db, writes
+from models import Artist, Show, Venue, WriteRequest
+from writes import KEY_REUSED
+
+VENUE_FORM = {
+    'name': 'Keyed Hall', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Market St',
+    'phone': '555-0199', 'genres': 'Jazz', 'facebook_link': '', 'website': '', 'image_link': '',
+}
+
+
+def venues_named(name):
+    return db.session.query(Venue).filter(Venue.name == name).count()
+
+
+def test_a_form_submitted_twice_is_written_once(app, client):
+    form = dict(VENUE_FORM, idempotency_key='form-key-1')
+    client.post('/venues/create', data=form)
+    client.post('/venues/create', data=form)
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 1
+        row = db.session.get(WriteRequest, 'form-key-1')
+        assert (row.operation, row.status) == ('create_venue', 'done')
+    status = client.get('/api/v1/writes/form-key-1')
+    assert status.status_code == 200
+    assert status.get_json()['status'] == 'done'
+
+
+def test_the_header_key_counts_too(app, client):
+    client.post('/venues/create', data=VENUE_FORM, headers={'Idempotency-Key': 'header-key-1'})
+    client.post('/venues/create', data=VENUE_FORM, headers={'Idempotency-Key': 'header-key-1'})
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 1
+
+
+def test_a_key_reused_for_other_values_is_rejected(app, client):
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='form-key-2'))
+    other = dict(VENUE_FORM, name='Other Hall', idempotency_key='form-key-2')
+    response = client.post('/venues/create', data=other, follow_redirects=True)
+    assert KEY_REUSED.encode() in response.data
+    # or for another operation
+    client.post('/artists/create', data=dict(VENUE_FORM, idempotency_key='form-key-2'))
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 1
+        assert venues_named('Other Hall') == 0
+        assert db.session.query(Artist).filter(Artist.name == 'Keyed Hall').count() == 0
+        assert db.session.get(WriteRequest, 'form-key-2').operation == 'create_venue'
+
+
+def test_editing_a_missing_or_deleted_venue_fails(app, client, catalog):
+    deleted = catalog['venues'][1]
+    client.delete('/venues/%d' % deleted)
+    for venue_id in (deleted, 9999):
+        key = 'edit-%d' % venue_id
+        client.post('/venues/%d/edit' % venue_id, data=dict(VENUE_FORM, idempotency_key=key))
+        assert client.get('/api/v1/writes/%s' % key).get_json()['status'] == 'failed'
+    with app.app_context():
+        assert db.session.get(Venue, deleted).name == 'Venue 1'
+        assert venues_named('Keyed Hall') == 0
+
+
+def test_writes_without_a_key_are_not_recorded(app, client):
+    client.post('/venues/create', data=VENUE_FORM)
+    client.post('/venues/create', data=VENUE_FORM)
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 2
+        assert db.session.query(WriteRequest).count() == 0
+    assert client.get('/api/v1/writes/no-such-key').status_code == 404
+
+
+@pytest.fixture
+def write_behind(app, monkeypatch):
+    monkeypatch.setattr(writes, 'queue', queue.Queue())
+    yield writes
+    writes.drain()
+
+
+def test_write_behind_records_every_write(app, client, write_behind):
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='queued-key-1'))
+    # resubmitted before the first one was flushed, and reused for other values
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='queued-key-1'))
+    other = dict(VENUE_FORM, name='Other Hall', idempotency_key='queued-key-1')
+    response = client.post('/venues/create', data=other, follow_redirects=True)
+    assert KEY_REUSED.encode() in response.data
+    client.post('/venues/create', data=dict(VENUE_FORM, name='Unkeyed Hall'))
+    write_behind.drain()
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 1
+        assert venues_named('Unkeyed Hall') == 1
+        assert venues_named('Other Hall') == 0
+        assert db.session.query(WriteRequest).count() == 2
+    assert client.get('/api/v1/writes/queued-key-1').get_json()['status'] == 'done'
+
+
+def test_write_behind_rejects_a_booking_overtaken_in_its_batch(app, client, catalog, write_behind):
+    # both pass the form's check: neither is in the database yet
+    start = (catalog['now'] + timedelta(days=30)).strftime('%Y-%m-%d %H:%M')
+    for key, artist_id in (('booking-1', catalog['artists'][0]), ('booking-2', catalog['artists'][1])):
+        client.post('/shows/create', data={'venue_id': catalog['venues'][0], 'artist_id': artist_id,
+                                           'start_time': start, 'idempotency_key': key})
+    write_behind.drain()
+    with app.app_context():
+        assert db.session.query(Show).count() == len(catalog['shows']) + 1
+    assert client.get('/api/v1/writes/booking-1').get_json()['status'] == 'done'
+    failed = client.get('/api/v1/writes/booking-2').get_json()
+    assert failed['status'] == 'failed'
+    assert failed['error'].startswith('show_venue_no_overlap')
+
+
+def test_old_write_requests_are_purged(app, client):
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='old-key'))
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='new-key'))
+    with app.app_context():
+        db.session.query(WriteRequest).filter(WriteRequest.key == 'old-key')\
+            .update({WriteRequest.created_at: datetime.utcnow() - timedelta(hours=72)})
+        db.session.commit()
+        result = app.test_cli_runner().invoke(args=['purge-write-requests'])
+        assert result.output == '1 write requests purged\n'
+        assert [row.key for row in db.session.query(WriteRequest)] == ['new-key']
+
+    # a purged key is written again
+    client.post('/venues/create', data=dict(VENUE_FORM, idempotency_key='old-key'))
+    with app.app_context():
+        assert venues_named('Keyed Hall') == 3
@@ -0,0 +1,330 @@
+from datetime import datetime
+from itertools import groupby
+
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
+
+import api
+from dates import label_datetimes
+from exporter import export_response
+from extensions import cache, db, replicas, writes
+from forms import VenueForm
+from models import Venue, venue_calendar_query, invalidate_venue_pages, live, nearby_shows_query, \
+    nearby_venue_query, show_artist_ids, soft_delete, split_shows, venue_detail_query, \
+    venue_listing_query, venue_nearby, venue_search
+from pagination import listing_page
+from schedule import calendar_json, render_calendar
+from writes import flash_result
+
+bp = Blueprint('venues', __name__)
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@cache.cached('venues')
+@replicas.reads
+def venues():
+    # keyed on (city, state, id) so every area stays contiguous across pages
+    data = []
+    query = venue_listing_query(request.args.get('genre'), request.args.get('state'))
+    page = listing_page(query, [Venue.city, Venue.state, Venue.id])
+
+    for (city, state), area_rows in groupby(page, key=lambda row: (row.city, row.state)):
+        data.append({
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': row.id,
+                'name': row.name,
+                'num_upcoming_show': row.num_upcoming_show
+            } for row in area_rows]
+        })
+    return render_template('pages/venues.html', areas=data, page=page)
+    
+
+@bp.route('/venues/export')
+@replicas.reads
+def export_venues():
+    columns = ['id', 'name', 'city', 'state', 'address', 'phone', 'genres', 'website',
+               'facebook_link', 'image_link', 'seeking_talent', 'seeking_description']
+    query = db.session.query(*[getattr(Venue, column) for column in columns])\
+        .filter(live(Venue)).order_by(Venue.id)
+    return export_response('venues', columns, query)
+
+
+@bp.route('/venues/search', methods=['POST'])
+@replicas.reads
+def search_venues():
+    search = request.form.get('search_term', '')
+    search_results = venue_search.search(search, current_app.config['SEARCH_RESULT_LIMIT'])
+    response = {'data': search_results, 'count': len(search_results)}
+    return render_template('pages/search_venues.html', results=response, search_term=search)
+
+
+@bp.route('/venues/nearby')
+@replicas.reads
+def nearby_venues():
+    latitude, longitude, radius, limit = nearby_args()
+    venues = nearby(latitude, longitude, radius, limit) if latitude is not None else []
+    label_datetimes([show for venue in venues for show in venue['upcoming_shows']])
+    return render_template('pages/nearby_venues.html', venues=venues, lat=latitude, lon=longitude,
+                           radius=radius)
+
+
+def nearby_args():
+    # ?lat=&lon=&radius= (km)&limit=; no lat and lon: the empty form
+    config = current_app.config
+    try:
+        radius = float(request.args.get('radius', config['NEARBY_RADIUS_KM']))
+        limit = int(request.args.get('limit', config['NEARBY_LIMIT']))
+        if 'lat' not in request.args and 'lon' not in request.args:
+            return None, None, radius, limit
+        latitude, longitude = float(request.args['lat']), float(request.args['lon'])
+    except (KeyError, ValueError):
+        abort(400, 'lat and lon are required, in degrees')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        abort(400, 'lat must be within [-90, 90] and lon within [-180, 180]')
+    if not 0 < radius <= config['MAX_NEARBY_RADIUS_KM']:
+        abort(400, 'radius must be within (0, %g] km' % config['MAX_NEARBY_RADIUS_KM'])
+    if not 0 < limit <= config['MAX_NEARBY_LIMIT']:
+        abort(400, 'limit must be within [1, %d]' % config['MAX_NEARBY_LIMIT'])
+    return latitude, longitude, radius, limit
+
+
+def nearby(latitude, longitude, radius, limit):
+    # the nearest venues, nearest first, each with its next upcoming shows
+    found = venue_nearby.nearest(latitude, longitude, radius, limit)
+    if not found:
+        return []
+    ids = [result.id for result in found]
+    rows = dict((row.id, row) for row in nearby_venue_query(ids))
+    shows = dict((venue_id, [dict(show._mapping) for show in venue_shows]) for venue_id, venue_shows in
+                 groupby(nearby_shows_query(ids, datetime.utcnow(), current_app.config['NEARBY_SHOWS']),
+                         key=lambda show: show.venue_id))
+    return [dict(rows[result.id]._mapping, distance=round(result.distance, 3),
+                 upcoming_shows=shows.get(result.id, []))
+            for result in found if result.id in rows]
+
+
+@bp.route('/venues/<int:venue_id>')
+@cache.cached('venue', 'venue_id')
+@replicas.reads
+def show_venue(venue_id):
+    data = venue_detail(venue_id)
+    label_datetimes(data['past_shows'] + data['upcoming_shows'])
+    return render_template('pages/show_venue.html', venue=data)
+
+
+@bp.route('/venues/<int:venue_id>/calendar')
+@cache.cached('venue', 'venue_id')
+@replicas.reads
+def venue_calendar(venue_id):
+    venue = db.session.query(Venue.name).filter(Venue.id == venue_id, live(Venue)).first() or abort(404)
+    return render_calendar(venue.name, url_for('.show_venue', venue_id=venue_id), 'artist',
+                           lambda start, end: venue_calendar_query(venue_id, start, end))
+
+
+def venue_detail(venue_id):
+    now = datetime.utcnow()
+    rows = venue_detail_query(venue_id).all()
+    if not rows:
+        abort(404)
+    venue = rows[0].Venue
+
+    past_shows, upcoming_shows = split_shows([{
+        'id': row.show_id,
+        'artist_id': row.artist_id,
+        'artist_name': row.artist_name,
+        'artist_image_link': row.artist_image_link,
+        'start_time': row.start_time
+    } for row in rows if row.artist_id is not None], now)
+
+    return {
+        'id': venue_id,
+        'name': venue.name,
+        'genres': venue.genres or [],
+        'address': venue.address,
+        'city': venue.city,
+        'state': venue.state,
+        'phone': venue.phone,
+        'website': venue.website,
+        'facebook_link': venue.facebook_link,
+        'image_link': venue.image_link,
+        'seeking_talent': venue.seeking_talent,
+        'seeking_description': venue.seeking_description,
+        'upcoming_shows': upcoming_shows,
+        'past_shows': past_shows,
+        'upcoming_shows_count': len(upcoming_shows),
+        'past_shows_count': len(past_shows)
+    }
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    name = request.form['name']
+    seeking_talent = True if request.form.get('seekign_description') == 'y' else False
+    values = dict(
+        name=name,
+        city=request.form['city'],
+        state=request.form['state'],
+        address=request.form['address'],
+        phone=request.form['phone'],
+        genres=request.form.getlist('genres'),
+        facebook_link=request.form['facebook_link'],
+        website=request.form['website'],
+        image_link=request.form['image_link'],
+        seeking_talent=seeking_talent,
+        seeking_description=request.form['seeking_description'] if seeking_talent == True else None)
+    flash_result(writes.submit('create_venue', values),
+                 done='Venue ' + name + ' was successfully created!',
+                 failed='An error occurred. Venue ' + name + ' could not be listed.',
+                 queued='Venue ' + name + ' will be listed in a moment.')
+    return redirect(url_for('.venues'))
+
+
+@writes.operation('create_venue')
+def apply_create_venue(values):
+    venue = Venue(**values)
+    db.session.add(venue)
+    return venue, lambda: cache.invalidate('venues')
+
+
+@bp.route('/venues/<int:venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    name = db.session.query(Venue.name).filter(Venue.id == venue_id, live(Venue)).scalar() or abort(404)
+    try:
+        delete_venues([venue_id])
+        flash('Venue ' + name + ' was successfully deleted')
+    except:
+        db.session.rollback()
+        flash('Oh no something went wrong. Please try again later')
+    finally:
+        db.session.close()
+        return redirect(url_for('index'))
+
+
+def delete_venues(venue_ids):
+    # -> the ids of the venues deleted; see Deletes in models.py
+    venue_ids, artist_ids = soft_delete(Venue, venue_ids)
+    db.session.commit()
+    if venue_ids:
+        venue_search.invalidate()
+        venue_nearby.invalidate()
+        invalidate_venue_pages(*venue_ids, artist_ids=artist_ids)
+    return venue_ids
+
+
+#  Update
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    # DONE the edit form need to add website, seeking_talent, seeking_description, image_link
+    form = VenueForm()
+    venue = Venue.query.filter(Venue.id == venue_id, live(Venue)).first_or_404()
+    form.name.data = venue.name
+    form.city.data = venue.city
+    form.state.data = venue.state
+    form.address.data = venue.address
+    form.phone.data = venue.phone
+    form.genres.data = venue.genres
+    form.facebook_link.data = venue.facebook_link
+    form.seeking_description.data = venue.seeking_description
+    form.seeking_talent.data = venue.seeking_talent
+    form.image_link.data = venue.image_link
+    form.website.data = venue.website
+
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    # DONE take values from the form submitted, and update existing
+    # venue record with ID <venue_id> using the new attributes
+    name = request.form['name']
+    seeking_talent = True if request.form.get('seeking_talent') == 'y' else False
+    values = dict(
+        id=venue_id,
+        name=name,
+        city=request.form['city'],
+        state=request.form['state'],
+        genres=request.form.getlist('genres'),
+        address=request.form['address'],
+        phone=request.form['phone'],
+        facebook_link=request.form['facebook_link'],
+        seeking_description=request.form['seeking_description'] if seeking_talent == True else None,
+        seeking_talent=seeking_talent,
+        image_link=request.form['image_link'],
+        website=request.form['website'])
+    flash_result(writes.submit('edit_venue', values),
+                 done='Venue ' + name + ' was successfully updated 🚀',
+                 failed='Something went wrong. Please try again later 😞',
+                 queued='Venue ' + name + ' will be updated in a moment 🚀')
+    return redirect(url_for('.show_venue', venue_id=venue_id))
+
+
+@writes.operation('edit_venue')
+def apply_edit_venue(values):
+    values = dict(values)
+    venue_id = values.pop('id')
+    venue = db.session.query(Venue).filter(Venue.id == venue_id, live(Venue)).first()
+    if venue is None:
+        # deleted, or never there, since the form was rendered
+        raise ValueError('there is no venue %d' % venue_id)
+    for name, value in values.items():
+        setattr(venue, name, value)
+    return venue, lambda: invalidate_venue_pages(venue_id, artist_ids=show_artist_ids(venue_id))
+
+
+#  API
+#  ----------------------------------------------------------------
+
+@bp.route('/api/v1/venues')
+@replicas.reads
+def api_venues():
+    query = venue_listing_query(request.args.get('genre'), request.args.get('state'))
+    page = listing_page(query, [Venue.city, Venue.state, Venue.id])
+    return api.json_response(api.listing(page.items, api.query_fields(query), page))
+
+
+@bp.route('/api/v1/venues/nearby')
+@replicas.reads
+def api_nearby_venues():
+    latitude, longitude, radius, limit = nearby_args()
+    if latitude is None:
+        abort(400, 'lat and lon are required, in degrees')
+    venues = nearby(latitude, longitude, radius, limit)
+    available = ['id', 'name', 'address', 'city', 'state', 'image_link', 'latitude', 'longitude',
+                 'distance', 'upcoming_shows']
+    return api.json_response(api.listing([[venue[field] for field in available] for venue in venues],
+                                         available))
+
+
+@bp.route('/api/v1/venues/<int:venue_id>')
+@replicas.reads
+def api_venue(venue_id):
+    return api.detail(venue_detail(venue_id))
+
+
+@bp.route('/api/v1/venues/<int:venue_id>/calendar')
+@replicas.reads
+def api_venue_calendar(venue_id):
+    db.session.query(Venue.id).filter(Venue.id == venue_id, live(Venue)).first() or abort(404)
+    return calendar_json(lambda start, end: venue_calendar_query(venue_id, start, end))
+
+
+@bp.route('/api/v1/venues/delete', methods=['POST'])
+def api_delete_venues():
+    # {"ids": [...]}: one UPDATE for all of them
+    ids = api.requested_ids(current_app.config['MAX_BULK_DELETE'])
+    return api.json_response({'deleted': delete_venues(ids)})
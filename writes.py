@@ -0,0 +1,270 @@
+import atexit
+import hashlib
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from flask import current_app, flash, jsonify, request
+
+#----------------------------------------------------------------------------#
+# Writes.
+#----------------------------------------------------------------------------#
+
+# The create and edit submissions validate their form and hand the values
+# to writes.submit() under an operation name ('create_venue', ...). An
+# operation is a function registered with @writes.operation that makes its
+# changes on db.session without committing, and returns the affected
+# object and a callback to run after the commit (cache invalidation).
+#
+# By default submit() applies and commits the write at once. With
+# WRITE_BEHIND on it only enqueues it: a background thread per worker
+# process takes up to WRITE_BATCH_SIZE writes, waiting at most
+# WRITE_FLUSH_INTERVAL seconds for a batch to fill, and commits them in
+# one transaction. If that transaction fails, each write of the batch is
+# retried in a transaction of its own, so only the bad ones fail.
+#
+# A submission may carry an idempotency key: the Idempotency-Key header or
+# the idempotency_key field that the forms render. The outcome of a keyed
+# write, and of every write with WRITE_BEHIND on, is recorded under its key
+# in the write_request table, in the same transaction as the write. A form
+# submitted twice is written once, and GET /api/v1/writes/<key> confirms a
+# write-behind submission was persisted. A key comes back with the
+# operation and a hash of the values it was first used for; reused for
+# another request, it is rejected. `flask purge-write-requests` removes the
+# records older than WRITE_REQUEST_TTL. A queued write lives in the memory of one worker until it is
+# flushed, a fraction of a second under load: a process that is killed
+# loses it, and the status endpoint answers 'unknown' for it, so clients
+# that must know should poll the status and resubmit with the same key.
+
+WriteResult = namedtuple('WriteResult', ['key', 'status', 'entity_id', 'error'])
+# record: whether its outcome goes to write_request
+Write = namedtuple('Write', ['key', 'operation', 'values', 'record'])
+
+KEY_FIELD = 'idempotency_key'
+KEY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+KEY_REUSED = 'That submission was already made with other values'
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def values_hash(values):
+    # the request a key stands for; datetimes and the like as str()
+    raw = json.dumps(values, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def request_key():
+    # the client's key, or None
+    key = request.headers.get(KEY_HEADER) or request.form.get(KEY_FIELD)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return None
+    return key
+
+
+def flash_result(result, done, failed, queued):
+    flash({'done': done, 'queued': queued, 'conflict': KEY_REUSED}.get(result.status, failed))
+
+
+class Writes(object):
+
+    def __init__(self, app=None):
+        self.operations = {}
+        self.pending = {}
+        self.queue = None
+        self.thread = None
+        self._draining = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        if app.config.get('WRITE_BEHIND'):
+            self.queue = queue.Queue(app.config.get('WRITE_QUEUE_SIZE', 10000))
+        app.jinja_env.globals['idempotency_key'] = new_key
+        app.add_url_rule('/api/v1/writes/<key>', 'write_status', self.status_view)
+
+    def operation(self, name):
+        def decorator(function):
+            self.operations[name] = function
+            return function
+        return decorator
+
+    def submit(self, name, values, key=None):
+        key = key or request_key()
+        request_hash = values_hash(values)
+        if key is not None:
+            done = self.recorded(key, name, request_hash)
+            if done is not None:
+                if done.status in ('done', 'conflict'):
+                    return done
+                # a failed write may be submitted again under its key
+                self.forget(key)
+        # without a key of the client's, a write is not deduplicated and is
+        # only recorded for the status of a queued one
+        record = key is not None or self.queue is not None
+        key = key or new_key()
+        if self.queue is not None:
+            try:
+                with self._lock:
+                    if key in self.pending:
+                        # submitted again before its first submission was flushed
+                        if self.pending[key] != (name, request_hash):
+                            return WriteResult(key, 'conflict', None, KEY_REUSED)
+                        return WriteResult(key, 'queued', None, None)
+                    self._start()
+                    self.pending[key] = (name, request_hash)
+                self.queue.put_nowait(Write(key, name, values, record))
+                return WriteResult(key, 'queued', None, None)
+            except queue.Full:
+                # back pressure: write it now rather than grow without bound
+                with self._lock:
+                    self.pending.pop(key, None)
+        return self.apply([Write(key, name, values, record)])[0]
+
+    def recorded(self, key, operation=None, request_hash=None):
+        # -> the outcome recorded under `key`, or a 'conflict' when it was
+        # recorded for another operation or other values than given
+        from models import WriteRequest
+        from extensions import db
+        row = db.session.get(WriteRequest, key)
+        if row is None:
+            return None
+        if operation is not None and (row.operation != operation or
+                                      row.request_hash not in (None, request_hash)):
+            return WriteResult(row.key, 'conflict', None, KEY_REUSED)
+        return WriteResult(row.key, row.status, row.entity_id, row.error)
+
+    def forget(self, key):
+        from models import WriteRequest
+        from extensions import db
+        db.session.query(WriteRequest).filter(WriteRequest.key == key).delete()
+        db.session.commit()
+
+    #  Applying
+    #  ----------------------------------------------------------------
+
+    def apply(self, writes):
+        # -> a WriteResult per write; one transaction for all of them, or
+        # one per write when that fails
+        from extensions import db
+        try:
+            results, callbacks = self._apply(writes)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(writes) == 1:
+                results = [self._failed(writes[0], e)]
+            else:
+                results = [result for write in writes for result in self.apply([write])]
+            return results
+        finally:
+            db.session.close()
+        for callback in callbacks:
+            callback()
+        return results
+
+    def _apply(self, writes):
+        from models import WriteRequest
+        from extensions import db
+        results = []
+        callbacks = []
+        for write in writes:
+            entity, callback = self.operations[write.operation](write.values)
+            db.session.flush()
+            entity_id = getattr(entity, 'id', None)
+            if write.record:
+                db.session.add(WriteRequest(key=write.key, operation=write.operation,
+                                            request_hash=values_hash(write.values),
+                                            status='done', entity_id=entity_id))
+            results.append(WriteResult(write.key, 'done', entity_id, None))
+            if callback is not None:
+                callbacks.append(callback)
+        return results, callbacks
+
+    def _failed(self, write, e):
+        # a resubmitted key hits the primary key of write_request: the
+        # first submission's outcome stands
+        from models import WriteRequest
+        from extensions import db
+        current_app.logger.exception('write %s (%s) failed', write.key, write.operation)
+        error = str(getattr(e, 'orig', None) or e).strip().split('\n')[0]
+        if not write.record:
+            return WriteResult(write.key, 'failed', None, error)
+        done = self.recorded(write.key)
+        if done is not None:
+            return done
+        try:
+            db.session.add(WriteRequest(key=write.key, operation=write.operation,
+                                        request_hash=values_hash(write.values),
+                                        status='failed', error=error))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        return WriteResult(write.key, 'failed', None, error)
+
+    #  Write-behind
+    #  ----------------------------------------------------------------
+
+    def _start(self):
+        # in the worker process, on its first queued write (not before a fork)
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self.thread.start()
+            if not self._draining:
+                atexit.register(self.drain)
+                self._draining = True
+
+    def _run(self):
+        batch_size = self.app.config.get('WRITE_BATCH_SIZE', 100)
+        interval = self.app.config.get('WRITE_FLUSH_INTERVAL', 0.05)
+        stopping = False
+        while not stopping:
+            batch = []
+            write = self.queue.get()
+            deadline = time.monotonic() + interval
+            while write is not None:
+                batch.append(write)
+                if len(batch) >= batch_size:
+                    break
+                try:
+                    write = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            else:
+                stopping = True
+            if batch:
+                self.flush(batch)
+
+    def flush(self, batch):
+        with self.app.app_context():
+            try:
+                self.apply(batch)
+            except Exception:
+                current_app.logger.exception('write-behind batch of %d failed', len(batch))
+        with self._lock:
+            for write in batch:
+                self.pending.pop(write.key, None)
+
+    def drain(self, timeout=10):
+        # at exit: flush what is queued
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    #  Status
+    #  ----------------------------------------------------------------
+
+    def status_view(self, key):
+        result = self.recorded(key)
+        if result is not None:
+            return jsonify(result._asdict())
+        if key in self.pending:
+            return jsonify(WriteResult(key, 'queued', None, None)._asdict()), 202
+        return jsonify(WriteResult(key, 'unknown', None, None)._asdict()), 404
@@ -0,0 +1,6 @@
+# Production entry point: gunicorn wsgi:app
+from app import create_app
+
+# no alembic in the workers; migrations run through `flask db`
+app = create_app(migrations=False)
+application = app